@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+from crawl_report import process_tree_rss
+
+# ----------------------------------------------------------------
+# CONFIGURACIÓN
+# ----------------------------------------------------------------
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS_FILE = os.path.join(HERE, "bench_results.jsonl")
+
+# Modos a comparar: nombre -> argumentos del spider (la URL se añade al final)
+SPIDER_MODES = {
+    "dynamic1":          ["webspider_dynamic1.py"],
+    "offline":           ["webspider_react_offline.py"],
+    "offline2":          ["webspider_react_offline2.py", "--workers", "1", "--no-hybrid"],
+    "offline2-hybrid":   ["webspider_react_offline2.py", "--workers", "1"],
+    "offline2-parallel": ["webspider_react_offline2.py", "--workers", "4"],
+}
+
+RSS_SAMPLE_INTERVAL = 0.2  # Segundos entre muestras de memoria
+
+# Mensajes con los que cada spider confirma una página guardada
+SAVED_MARKERS = ("HTML guardado", "Guardado HTML")
+
+
+# ----------------------------------------------------------------
+# FIXTURE: SPA REACT-LIKE LOCAL
+# ----------------------------------------------------------------
+APP_JS = """
+// SPA mínima: renderiza la ruta actual a partir de ROUTES y de una
+// petición fetch, como haría un bundle de React.
+const ROUTES = __ROUTES__;
+
+async function render() {
+    const route = ROUTES[location.pathname] || ROUTES['/'];
+    const response = await fetch(route.api);
+    const data = await response.json();
+    const root = document.getElementById('root');
+    root.innerHTML =
+        '<h1>' + data.title + '</h1><p>' + data.body + '</p>' +
+        '<nav>' + route.links.map(l => '<a href="' + l + '">' + l + '</a>').join(' ') + '</nav>' +
+        route.images.map(i => '<img src="' + i + '">').join('');
+}
+render();
+"""
+
+SHELL_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Fixture</title>
+<link rel="stylesheet" href="/static/css/main.css"></head>
+<body><noscript>You need to enable JavaScript to run this app.</noscript>
+<div id="root"></div><script src="/static/js/app.js"></script></body></html>
+"""
+
+STATIC_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<link rel="stylesheet" href="/static/css/main.css"></head>
+<body><h1>{title}</h1><p>{body}</p><nav>{links}</nav></body></html>
+"""
+
+def generate_fixture(folder: str, pages: int, links_per_page: int, assets: int,
+                     asset_size: int, static_pages: int, seed: int = 1) -> dict:
+    """
+    Genera en 'folder' un sitio SPA determinista (misma semilla -> mismo sitio):
+    - 'pages' rutas de la SPA (/ y /page/N) que se pintan con JS tras un fetch
+    - 'static_pages' páginas HTML ya renderizadas (camino rápido del modo híbrido)
+    - 'assets' imágenes de 'asset_size' bytes repartidas entre las páginas
+    """
+    rng = random.Random(seed)
+    paths = ["/"] + [f"/page/{i}" for i in range(1, pages)]
+    static_paths = [f"/legal/doc{i}.html" for i in range(static_pages)]
+    images = [f"/static/media/img{i}.png" for i in range(assets)]
+    all_links = paths + static_paths
+
+    routes = {}
+    for i, path in enumerate(paths):
+        # Cadena para que todo sea alcanzable + enlaces aleatorios
+        links = {paths[(i + 1) % len(paths)]}
+        links.update(rng.sample(all_links, min(links_per_page, len(all_links))))
+        routes[path] = {
+            "api": f"/api/{i}.json",
+            "links": sorted(links),
+            "images": rng.sample(images, min(3, len(images))),
+        }
+        write_file(folder, f"api/{i}.json", json.dumps({
+            "title": f"Página {i}",
+            "body": "Lorem ipsum dolor sit amet. " * 20,
+        }).encode("utf-8"))
+
+    write_file(folder, "index.html", SHELL_HTML.encode("utf-8"))
+    write_file(folder, "static/js/app.js", APP_JS.replace("__ROUTES__", json.dumps(routes)).encode("utf-8"))
+    write_file(folder, "static/css/main.css", b"body{font-family:sans-serif}\n" * 50)
+    for image in images:
+        write_file(folder, image.lstrip("/"), rng.randbytes(asset_size))
+    for i, path in enumerate(static_paths):
+        links = " ".join(f'<a href="{l}">{l}</a>' for l in rng.sample(all_links, min(links_per_page, len(all_links))))
+        html = STATIC_HTML.format(title=f"Documento {i}", body="Texto legal. " * 60, links=links)
+        write_file(folder, path.lstrip("/"), html.encode("utf-8"))
+
+    return {"routes": len(paths), "static_pages": len(static_paths), "assets": len(images)}
+
+def write_file(folder: str, relative_path: str, content: bytes):
+    path = os.path.join(folder, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+# ----------------------------------------------------------------
+# SERVIDOR LOCAL CON LATENCIA ARTIFICIAL
+# ----------------------------------------------------------------
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """
+    Sirve la fixture con 'latency' segundos de espera por petición.
+    Las rutas sin extensión devuelven index.html, como un servidor de SPA.
+    """
+    latency = 0.0
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        path = self.path.split("?", 1)[0]
+        if "." not in os.path.basename(path):
+            self.path = "/index.html"
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(folder: str, latency_ms: float) -> ThreadingHTTPServer:
+    handler = type("Handler", (FixtureHandler,), {"latency": latency_ms / 1000.0})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(handler, directory=folder))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ----------------------------------------------------------------
+# EJECUCIÓN Y MEDICIÓN
+# ----------------------------------------------------------------
+def folder_size(folder: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(folder):
+        for name in filenames:
+            total += os.path.getsize(os.path.join(dirpath, name))
+    return total
+
+def mirror_size(workdir: str) -> int:
+    """
+    Bytes del espejo: todos los spiders guardan en <carpeta_base>/<dominio>/.
+    Los ficheros sueltos de la carpeta base (crawl_report.jsonl,
+    .resource_index.sqlite de offline2) no cuentan, para comparar modos.
+    """
+    total = 0
+    for base in os.scandir(workdir):
+        if base.is_dir():
+            total += sum(folder_size(entry.path) for entry in os.scandir(base.path) if entry.is_dir())
+    return total
+
+def run_spider(mode: str, url: str, timeout: float) -> dict:
+    """
+    Ejecuta un spider en una carpeta temporal y mide tiempo total,
+    páginas guardadas, bytes escritos y pico de memoria (spider + Chromium).
+    """
+    workdir = tempfile.mkdtemp(prefix=f"bench_{mode}_")
+    command = [sys.executable, os.path.join(HERE, SPIDER_MODES[mode][0])] + SPIDER_MODES[mode][1:] + [url]
+    peak_rss = 0
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=workdir, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True)
+
+    # Muestreo de memoria en paralelo a la lectura de la salida
+    stop = threading.Event()
+    def sample():
+        nonlocal peak_rss
+        while not stop.is_set():
+            peak_rss = max(peak_rss, process_tree_rss(proc.pid))
+            stop.wait(RSS_SAMPLE_INTERVAL)
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    try:
+        output, _ = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        output, _ = proc.communicate()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    sampler.join()
+
+    pages = sum(1 for line in output.splitlines() if any(m in line for m in SAVED_MARKERS))
+    result = {
+        "mode": mode,
+        "exit_code": proc.returncode,
+        "seconds": round(elapsed, 3),
+        "pages": pages,
+        "pages_per_sec": round(pages / elapsed, 3) if elapsed else 0,
+        "bytes_written": mirror_size(workdir),
+        "peak_rss_mb": round(peak_rss / (1024 * 1024), 1),
+    }
+    if proc.returncode != 0:
+        result["tail"] = output.splitlines()[-5:]
+    shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def median_result(runs: list) -> dict:
+    """
+    Combina repeticiones de un modo tomando la mediana de cada métrica.
+    """
+    result = dict(runs[-1])
+    for key in ("seconds", "pages", "pages_per_sec", "bytes_written", "peak_rss_mb"):
+        result[key] = statistics.median(run[key] for run in runs)
+    result["runs"] = len(runs)
+    return result
+
+def print_table(rows: list):
+    print(f"{'commit':<10} {'modo':<18} {'seg':>8} {'págs':>6} {'págs/s':>8} {'MB escritos':>12} {'RSS MB':>8}")
+    for row in rows:
+        print(f"{row.get('commit', ''):<10} {row['mode']:<18} {row['seconds']:>8.2f} {row['pages']:>6} "
+              f"{row['pages_per_sec']:>8.2f} {row['bytes_written'] / 1e6:>12.2f} {row['peak_rss_mb']:>8.1f}")
+
+def show_history(params: dict):
+    """
+    Muestra los resultados guardados con los mismos parámetros de fixture,
+    para comparar entre commits.
+    """
+    if not os.path.exists(RESULTS_FILE):
+        print("[INFO] Todavía no hay resultados guardados.")
+        return
+    with open(RESULTS_FILE, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    print_table([row for row in rows if row.get("params") == params])
+
+
+# ----------------------------------------------------------------
+# MAIN
+# ----------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark de los spiders contra una SPA local generada.")
+    parser.add_argument("--modes", default=",".join(SPIDER_MODES),
+                        help="Modos separados por coma (por defecto: %(default)s)")
+    parser.add_argument("--pages", type=int, default=30, help="Rutas de la SPA")
+    parser.add_argument("--links", type=int, default=5, help="Enlaces por página")
+    parser.add_argument("--assets", type=int, default=20, help="Imágenes de la fixture")
+    parser.add_argument("--asset-size", type=int, default=20000, help="Bytes por imagen")
+    parser.add_argument("--static-pages", type=int, default=5, help="Páginas HTML ya renderizadas")
+    parser.add_argument("--latency", type=float, default=20, help="Latencia por petición (ms)")
+    parser.add_argument("--seed", type=int, default=1, help="Semilla de la fixture")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeticiones por modo (mediana)")
+    parser.add_argument("--timeout", type=float, default=600, help="Límite por ejecución (s)")
+    parser.add_argument("--no-save", action="store_true", help=f"No añadir resultados a {RESULTS_FILE}")
+    parser.add_argument("--history", action="store_true",
+                        help="Solo mostrar resultados anteriores con estos parámetros")
+    args = parser.parse_args()
+
+    params = {
+        "pages": args.pages, "links": args.links, "assets": args.assets,
+        "asset_size": args.asset_size, "static_pages": args.static_pages,
+        "latency_ms": args.latency, "seed": args.seed,
+    }
+    if args.history:
+        show_history(params)
+        return
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in SPIDER_MODES]
+    if unknown:
+        print(f"[ERROR] Modos desconocidos: {', '.join(unknown)}")
+        sys.exit(1)
+
+    fixture_folder = tempfile.mkdtemp(prefix="bench_fixture_")
+    info = generate_fixture(fixture_folder, args.pages, args.links, args.assets,
+                            args.asset_size, args.static_pages, args.seed)
+    server = start_server(fixture_folder, args.latency)
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    print(f"[INFO] Fixture en {url}: {info['routes']} rutas SPA, "
+          f"{info['static_pages']} estáticas, {info['assets']} imágenes")
+
+    commit = git_commit()
+    rows = []
+    try:
+        for mode in modes:
+            runs = []
+            for _ in range(args.repeat):
+                print(f"[INFO] Ejecutando {mode}...")
+                runs.append(run_spider(mode, url, args.timeout))
+            result = median_result(runs)
+            result.update({"commit": commit, "timestamp": int(time.time()), "params": params})
+            if result["exit_code"] != 0:
+                print(f"[ERROR] {mode} terminó con código {result['exit_code']}: {result.get('tail')}")
+            rows.append(result)
+    finally:
+        server.shutdown()
+        shutil.rmtree(fixture_folder, ignore_errors=True)
+
+    print_table(rows)
+    if not args.no_save:
+        with open(RESULTS_FILE, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        print(f"[INFO] Resultados añadidos a {RESULTS_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+
+import httpx
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Request, Response
+
+# Cargar variables de entorno definidas en el fichero .env
+load_dotenv()
+
+# Configuración de la caché y del Directus de origen
+DIRECTUS_URL = os.getenv("DIRECTUS_URL", "http://directus:8055").rstrip("/")
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))                      # Segundos
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+WEBHOOK_SECRET = os.getenv("CACHE_WEBHOOK_SECRET")
+
+# Cabeceras de la respuesta de Directus que se reenvían al cliente
+FORWARDED_HEADERS = ("content-type", "cache-control", "etag", "last-modified")
+
+app = FastAPI()
+
+
+class LRUCache:
+    """
+    Caché LRU en memoria con TTL y límite por número de entradas y por bytes.
+    Cada entrada se indexa también por colección para poder invalidarla
+    cuando Directus notifica un cambio.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # clave -> (expira, colección, status, headers, body)
+        self.by_collection = {}       # colección -> set(claves)
+        self.size = 0
+
+    def get(self, key: str):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self.delete(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, collection: str, status: int, headers: dict, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        self.delete(key)
+        self.entries[key] = (time.monotonic() + self.ttl, collection, status, headers, body)
+        self.by_collection.setdefault(collection, set()).add(key)
+        self.size += len(body)
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            oldest = next(iter(self.entries))
+            self.delete(oldest)
+
+    def delete(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.size -= len(entry[4])
+        keys = self.by_collection.get(entry[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.by_collection[entry[1]]
+
+    def invalidate(self, collection: str = None) -> int:
+        """
+        Borra las entradas de una colección (o todas si no se indica).
+        Devuelve el número de entradas eliminadas.
+        """
+        keys = list(self.entries) if collection is None else list(self.by_collection.get(collection, ()))
+        for key in keys:
+            self.delete(key)
+        return len(keys)
+
+
+cache = LRUCache(CACHE_TTL, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+
+# Peticiones a Directus en curso: clave -> Future compartido por todos los
+# clientes que piden lo mismo (request collapsing).
+inflight = {}
+
+# Generación por colección ("*" para la caché completa): si llega una
+# invalidación mientras una petición está en curso, su resultado ya no
+# se guarda en caché.
+generations = {}
+
+client = httpx.AsyncClient(base_url=DIRECTUS_URL, timeout=30)
+
+
+def cache_key(request: Request) -> str:
+    """
+    La clave es la ruta más la query ordenada, para que '?a=1&b=2' y
+    '?b=2&a=1' compartan entrada.
+    """
+    query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+    return f"{request.url.path}?{query}"
+
+def collection_from_path(path: str) -> str:
+    """
+    '/items/landing/1' -> 'landing'
+    """
+    parts = path.strip("/").split("/")
+    return parts[1] if len(parts) > 1 else ""
+
+def is_cacheable(request: Request) -> bool:
+    """
+    Solo se cachean lecturas anónimas: con token o cookie de sesión la
+    respuesta depende de los permisos del usuario.
+    """
+    return (
+        request.method == "GET"
+        and "authorization" not in request.headers
+        and "access_token" not in request.query_params
+        and "directus_session_token" not in request.cookies
+    )
+
+async def forward(request: Request) -> httpx.Response:
+    """
+    Reenvía la petición tal cual a Directus.
+    """
+    headers = {k: v for k, v in request.headers.items() if k.lower() not in ("host", "content-length")}
+    return await client.request(
+        request.method,
+        request.url.path,
+        params=request.url.query,
+        headers=headers,
+        content=await request.body(),
+    )
+
+def build_response(status: int, headers: dict, body: bytes, cache_status: str) -> Response:
+    response = Response(content=body, status_code=status, headers=headers)
+    response.headers["X-Cache"] = cache_status
+    return response
+
+def generation_of(collection: str) -> tuple:
+    return generations.get("*", 0), generations.get(collection, 0)
+
+def invalidate(collection: str = None) -> int:
+    """
+    Invalida una colección (o toda la caché con collection=None) y avanza
+    su generación para descartar las respuestas que estén en camino.
+    """
+    name = "*" if collection is None else collection
+    generations[name] = generations.get(name, 0) + 1
+    return cache.invalidate(collection)
+
+async def fetch_and_store(key: str, collection: str, request: Request):
+    generation = generation_of(collection)
+    upstream = await forward(request)
+    headers = {k: v for k, v in upstream.headers.items() if k.lower() in FORWARDED_HEADERS}
+    result = (upstream.status_code, headers, upstream.content)
+    if upstream.status_code == 200 and generation_of(collection) == generation:
+        cache.set(key, collection, *result)
+    return result
+
+
+@app.api_route("/items/{path:path}", methods=["GET", "POST", "PATCH", "DELETE", "SEARCH"])
+async def items_proxy(request: Request):
+    """
+    Sirve los GET de /items/... desde la caché. Las escrituras se reenvían
+    a Directus e invalidan la colección afectada.
+    """
+    collection = collection_from_path(request.url.path)
+
+    if not is_cacheable(request):
+        try:
+            upstream = await forward(request)
+        except httpx.HTTPError as error:
+            raise HTTPException(status_code=502, detail=str(error))
+        if request.method != "GET" and upstream.status_code < 400:
+            invalidate(collection)
+        headers = {k: v for k, v in upstream.headers.items() if k.lower() in FORWARDED_HEADERS}
+        return build_response(upstream.status_code, headers, upstream.content, "BYPASS")
+
+    key = cache_key(request)
+    entry = cache.get(key)
+    if entry is not None:
+        return build_response(entry[2], entry[3], entry[4], "HIT")
+
+    future = inflight.get(key)
+    if future is not None:
+        cache_status = "COALESCED"
+    else:
+        cache_status = "MISS"
+        future = asyncio.ensure_future(fetch_and_store(key, collection, request))
+        inflight[key] = future
+        future.add_done_callback(lambda _: inflight.pop(key, None))
+
+    try:
+        status, headers, body = await asyncio.shield(future)
+    except httpx.HTTPError as error:
+        raise HTTPException(status_code=502, detail=str(error))
+    return build_response(status, headers, body, cache_status)
+
+
+@app.post("/webhook/directus")
+async def directus_webhook(request: Request):
+    """
+    Endpoint para el webhook de Directus (Flow con trigger de evento
+    items.create / items.update / items.delete y operación "Webhook / Request URL").
+    Espera un JSON con al menos la colección, p.ej. {"collection": "landing", "keys": [1]}.
+    Sin colección se vacía la caché completa.
+    """
+    if WEBHOOK_SECRET and request.headers.get("x-webhook-secret") != WEBHOOK_SECRET:
+        raise HTTPException(status_code=401, detail="Secreto de webhook inválido.")
+
+    try:
+        payload = await request.json()
+    except ValueError:
+        payload = {}
+    collection = payload.get("collection") if isinstance(payload, dict) else None
+    removed = invalidate(collection)
+    return {"status": "Caché invalidada", "collection": collection, "removed": removed}
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """
+    Estado de la caché, útil para comprobar la tasa de aciertos.
+    """
+    return {
+        "entries": len(cache.entries),
+        "bytes": cache.size,
+        "inflight": len(inflight),
+        "collections": sorted(cache.by_collection),
+    }
+
+
+@app.on_event("shutdown")
+async def close_client():
+    await client.aclose()
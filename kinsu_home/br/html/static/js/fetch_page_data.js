@@ -1,4 +1,26 @@
+// Instantánea estática generada por directus_snapshot.py (static/data/<colección>/<id>.json)
+const SNAPSHOT_BASE = '/static/data';
+
+async function fetchSnapshot(category, pageNumber) {
+    try {
+        const response = await fetch(`${SNAPSHOT_BASE}/${category}/${pageNumber}.json`);
+        if (!response.ok) {
+            return null;
+        }
+        const data = await response.json();
+        return data.data;
+    } catch (error) {
+        return null;
+    }
+}
+
 export async function fetchPageData(url, category, pageNumber) {
+    // Primero la instantánea estática: no toca Directus ni su base de datos
+    const snapshot = await fetchSnapshot(category, pageNumber);
+    if (snapshot) {
+        return snapshot;
+    }
+
     try {
         const response = await fetch(url + `/items/${category}/${pageNumber}`);
         if (!response.ok) {
@@ -10,4 +32,4 @@ export async function fetchPageData(url, category, pageNumber) {
         console.error('Error al obtener datos de la página:', error);
         return null;
     }
-}
\ No newline at end of file
+}
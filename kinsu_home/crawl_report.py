@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import argparse
+from contextlib import contextmanager
+from collections import defaultdict
+
+# ----------------------------------------------------------------
+# INFORME DE RASTREO (JSON LINES)
+# ----------------------------------------------------------------
+# Cada línea es un evento:
+#   {"event": "page", "url", "mode", "timings": {etapa: segundos}, "total", "retries", "error"}
+#   {"event": "resource", "url", "type", "bytes", "source"}
+#   {"event": "summary", "pages", "failures", "counters", "resources_by_type", ...}
+#
+# Etapas de página: fetch (camino rápido HTTP), navigation, networkidle,
+# content, extract, rewrite, write.
+#
+# Contadores de recursos:
+#   http_resource_hits/misses    descargas por HTTP (camino rápido y recursos
+#                                extra del DOM) ya presentes / nuevas
+#   route_resource_hits/misses   peticiones interceptadas en Chromium de
+#                                recursos ya guardados (se sirven desde el
+#                                disco) / nuevos
+#
+# Cada recurso genera un solo evento "resource", la primera vez que se guarda.
+
+
+class CrawlReport:
+    """
+    Acumula métricas del rastreo y las escribe como JSON lines.
+    Sin 'path' solo agrega en memoria (para el resumen final).
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8") if path else None
+        self.started = time.perf_counter()
+        self.pages = {}                       # url -> {"timings", "retries", "mode"}
+        self.counters = defaultdict(int)      # retries, failures, http_resource_hits...
+        self.by_type = defaultdict(lambda: {"count": 0, "bytes": 0})
+        self.page_count = 0
+
+    def _write(self, event: dict):
+        if self.file is not None:
+            self.file.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def _page(self, url: str) -> dict:
+        return self.pages.setdefault(url, {"timings": {}, "retries": 0, "mode": "render"})
+
+    @contextmanager
+    def timer(self, url: str, stage: str):
+        """
+        with report.timer(url, "navigation"): ...
+        Si la etapa se repite (reintentos), los tiempos se suman.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings = self._page(url)["timings"]
+            timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+    def set_mode(self, url: str, mode: str):
+        self._page(url)["mode"] = mode
+
+    def retry(self, url: str):
+        self._page(url)["retries"] += 1
+        self.counters["retries"] += 1
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] += n
+
+    def page_done(self, url: str, error: str = None):
+        """
+        Cierra la página y escribe su línea en el informe.
+        """
+        page = self.pages.pop(url, None) or {"timings": {}, "retries": 0, "mode": "render"}
+        self.page_count += 1
+        if error:
+            self.counters["failures"] += 1
+        timings = {stage: round(seconds, 4) for stage, seconds in page["timings"].items()}
+        self._write({
+            "event": "page",
+            "url": url,
+            "mode": page["mode"],
+            "timings": timings,
+            "total": round(sum(timings.values()), 4),
+            "retries": page["retries"],
+            "error": error,
+        })
+
+    def resource(self, url: str, resource_type: str, size: int, source: str = "network"):
+        stats = self.by_type[resource_type]
+        stats["count"] += 1
+        stats["bytes"] += size
+        self._write({"event": "resource", "url": url, "type": resource_type,
+                     "bytes": size, "source": source})
+
+    def close(self, **extra) -> dict:
+        """
+        Escribe la línea de resumen y cierra el fichero. Devuelve el resumen.
+        """
+        summary = {
+            "event": "summary",
+            "elapsed": round(time.perf_counter() - self.started, 3),
+            "pages": self.page_count,
+            "failures": self.counters.get("failures", 0),
+            "counters": dict(self.counters),
+            "resources_by_type": dict(self.by_type),
+        }
+        summary.update(extra)
+        self._write(summary)
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        return summary
+
+
+def process_tree_rss(pid: int = None) -> int:
+    """
+    Memoria residente (bytes) del proceso 'pid' más todos sus descendientes
+    (p.ej. el spider y los procesos de Chromium). Lee /proc, así que solo
+    funciona en Linux; en otros sistemas devuelve 0.
+    """
+    pid = pid or os.getpid()
+    children = defaultdict(list)
+    rss_pages = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return 0
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue  # El proceso terminó mientras leíamos
+        # El nombre del proceso va entre paréntesis y puede contener espacios
+        fields = stat[stat.rfind(")") + 2:].split()
+        children[int(fields[1])].append(int(entry))
+        rss_pages[int(entry)] = int(fields[21])
+
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        total += rss_pages.get(current, 0)
+        pending.extend(children.get(current, ()))
+    return total * os.sysconf("SC_PAGE_SIZE")
+
+
+# ----------------------------------------------------------------
+# RESUMEN DE UN INFORME
+# ----------------------------------------------------------------
+def load_events(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def summarize(path: str, top: int = 10):
+    """
+    Muestra las páginas más lentas, los recursos más grandes y los totales.
+    """
+    events = load_events(path)
+    pages = [e for e in events if e["event"] == "page"]
+    resources = [e for e in events if e["event"] == "resource"]
+    summary = next((e for e in events if e["event"] == "summary"), None)
+
+    print(f"== Páginas más lentas (top {top}) ==")
+    for page in sorted(pages, key=lambda e: e["total"], reverse=True)[:top]:
+        stages = ", ".join(f"{k}={v:.2f}s" for k, v in page["timings"].items())
+        status = f" ERROR: {page['error']}" if page["error"] else ""
+        print(f"{page['total']:8.2f}s  [{page['mode']}] {page['url']}  ({stages}){status}")
+
+    print(f"\n== Recursos más grandes (top {top}) ==")
+    for res in sorted(resources, key=lambda e: e["bytes"], reverse=True)[:top]:
+        print(f"{format_bytes(res['bytes']):>10}  [{res['type']}] {res['url']}")
+
+    totals = defaultdict(float)
+    for page in pages:
+        for stage, seconds in page["timings"].items():
+            totals[stage] += seconds
+    print("\n== Tiempo total por etapa ==")
+    for stage, seconds in sorted(totals.items(), key=lambda kv: kv[1], reverse=True):
+        print(f"{seconds:8.2f}s  {stage}")
+
+    if summary:
+        print("\n== Resumen ==")
+        print(f"Duración: {summary['elapsed']}s, páginas: {summary['pages']}, "
+              f"fallos: {summary['failures']}")
+        for name, value in sorted(summary["counters"].items()):
+            print(f"  {name}: {value}")
+        for rtype, stats in sorted(summary["resources_by_type"].items()):
+            print(f"  {rtype}: {stats['count']} recursos, {format_bytes(stats['bytes'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resume un informe de rastreo (JSON lines).")
+    parser.add_argument("report", help="Fichero generado por el spider (crawl_report.jsonl)")
+    parser.add_argument("--top", type=int, default=10, help="Número de entradas por ranking")
+    args = parser.parse_args()
+
+    try:
+        summarize(args.report, args.top)
+    except FileNotFoundError:
+        print(f"[ERROR] No existe el informe {args.report}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
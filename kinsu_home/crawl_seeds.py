@@ -0,0 +1,218 @@
+import re
+import json
+import xml.etree.ElementTree as ET
+from urllib.parse import urlparse, urljoin
+
+# ----------------------------------------------------------------
+# SEMILLAS PARA LA COLA DE RASTREO
+# ----------------------------------------------------------------
+# Funciones puras (sin red) que extraen rutas conocidas del sitio a partir
+# de sitemap.xml, de tablas de rutas en JS (React Router, sitemap.js) o de
+# una lista escrita a mano. Los spiders las usan para llenar la cola antes
+# de empezar a renderizar.
+
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+# Enlaces absolutos en JS: <Link to="/blog">, {href: "/contact-us"}...
+# Las claves 'path' de React Router se resuelven aparte (extract_router_paths)
+# porque pueden ser relativas a su ruta padre.
+ROUTE_KEY_PATTERN = re.compile(
+    r"""\\?["']?\b(?:to|href|route)\\?["']?\s*:\s*\\?["'](/[^"'\\\s]*)\\?["']"""
+)
+
+# Tokens de JS relevantes para seguir el anidamiento de las tablas de rutas
+JS_TOKEN = re.compile(r"""
+    (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+  | (?P<template>`(?:\\.|[^`\\])*`)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<path>\bpath\s*:\s*)
+  | (?P<element>\b(?:element|component|Component)\s*:)
+  | (?P<open>[\[{(])
+  | (?P<close>[\]})])
+  | (?P<slash>/)
+""", re.VERBOSE | re.DOTALL)
+JS_REGEX_LITERAL = re.compile(r"/(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n])+/[a-z]*")
+# Tras estos caracteres, '/' abre un literal de regex y no es una división
+REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^") | {""}
+
+# Extensiones que no son rutas de página
+ASSET_EXTENSIONS = (
+    ".js", ".css", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".webp",
+    ".avif", ".woff", ".woff2", ".ttf", ".json", ".map",
+)
+
+
+def parse_sitemap_xml(xml_text: str):
+    """
+    Devuelve (urls_de_paginas, urls_de_sitemaps_hijos).
+    Soporta tanto <urlset> como <sitemapindex>.
+    """
+    try:
+        root = ET.fromstring(xml_text)
+    except ET.ParseError:
+        return [], []
+
+    pages, children = [], []
+    for loc in root.iter(f"{SITEMAP_NS}loc"):
+        if not loc.text:
+            continue
+        parent_is_index = root.tag == f"{SITEMAP_NS}sitemapindex"
+        (children if parent_is_index else pages).append(loc.text.strip())
+    return pages, children
+
+def is_page_route(path: str) -> bool:
+    """
+    Descarta recursos estáticos y rutas con parámetros (/blog/:id, /*).
+    """
+    if not path.startswith("/") or path.startswith("//"):
+        return False
+    if ":" in path or "*" in path:
+        return False
+    return not path.lower().split("?")[0].endswith(ASSET_EXTENSIONS)
+
+def _walk_json(value, paths: list):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in ("path", "route", "url", "href") and isinstance(item, str):
+                paths.append(item)
+            else:
+                _walk_json(item, paths)
+    elif isinstance(value, list):
+        for item in value:
+            _walk_json(item, paths)
+    elif isinstance(value, str) and value.lstrip().startswith(("{", "[")):
+        # El árbol de site_map en Directus viene como string JSON dentro del JSON
+        try:
+            _walk_json(json.loads(value), paths)
+        except ValueError:
+            pass
+
+def _route_tables(js: str):
+    """
+    Recorre el JS y agrupa las claves 'path' por la tabla (array) que las
+    contiene. Devuelve (rutas, tablas):
+      rutas:  {pos_objeto: path}
+      tablas: {pos_array: {"routes": [pos_objeto...], "parent": pos_objeto_padre,
+                           "router": bool}}
+    Una ruta es un objeto {path: ...} cuyo array contenedor está como mucho
+    envuelto en paréntesis (jsx(Route, {path...})). 'parent' es el objeto
+    que tiene ese array como children, si es a su vez una ruta.
+    """
+    routes, tables, router_objects = {}, {}, set()
+    stack = []   # [(caracter, posicion)]
+    pos = 0
+    while True:
+        m = JS_TOKEN.search(js, pos)
+        if not m:
+            break
+        kind, pos = m.lastgroup, m.end()
+        if kind == "open":
+            stack.append((m.group(), m.start()))
+        elif kind == "close":
+            if stack:
+                stack.pop()
+        elif kind == "slash":
+            before = js[max(0, m.start() - 16):m.start()].rstrip()
+            if before[-1:] in REGEX_PRECEDERS or before.endswith(("return", "typeof")):
+                literal = JS_REGEX_LITERAL.match(js, m.start())
+                if literal:
+                    pos = literal.end()
+        elif kind == "element" and stack and stack[-1][0] == "{":
+            router_objects.add(stack[-1][1])
+        elif kind == "path" and stack and stack[-1][0] == "{":
+            value = JS_TOKEN.match(js, pos)
+            if not value or value.lastgroup != "string":
+                continue
+            pos = value.end()
+            obj = stack[-1][1]
+            # Array contenedor, saltando solo paréntesis de llamadas
+            i = len(stack) - 2
+            while i >= 0 and stack[i][0] == "(":
+                i -= 1
+            if i < 0 or stack[i][0] != "[":
+                continue   # No está en una tabla (p.ej. cookies {path: "/"})
+            table = tables.setdefault(stack[i][1], {"routes": [], "parent": None, "router": False})
+            j = i - 1
+            while j >= 0 and stack[j][0] == "(":
+                j -= 1
+            if j >= 0 and stack[j][0] == "{":
+                table["parent"] = stack[j][1]
+            routes[obj] = value.group()[1:-1]
+            table["routes"].append(obj)
+
+    for table in tables.values():
+        table["router"] = any(obj in router_objects for obj in table["routes"])
+    return routes, tables
+
+def _join_route(parent: str, child: str) -> str:
+    parent = parent.rstrip("*").rstrip("/")
+    if child.startswith("/") and (child + "/").startswith(parent + "/"):
+        return child   # Ruta hija absoluta que ya incluye al padre
+    child = child.strip("/")
+    return f"{parent}/{child}" if child else (parent or "/")
+
+def extract_router_paths(js: str) -> list:
+    """
+    Rutas de las tablas de React Router de un bundle, resueltas contra su
+    ruta padre ({path: "proyecto3060", children: [{path: "contact"}]} ->
+    /proyecto3060/contact).
+
+    Las tablas de <Routes> descendientes (montadas bajo un 'quotation/*' de
+    otro componente, a menudo en otro chunk) no se pueden enlazar con su
+    padre de forma estática. Por eso solo se siembran las tablas raíz: las
+    que tienen la ruta comodín '*' (página 404 de la app) y las listas de
+    rutas que no son de React Router (sin element/component).
+    """
+    routes, tables = _route_tables(js)
+    table_of = {obj: key for key, table in tables.items() for obj in table["routes"]}
+
+    def resolve(obj, depth=0):
+        """
+        Ruta completa de una ruta, o None si cuelga de una tabla no raíz.
+        """
+        table = tables[table_of[obj]]
+        parent = table["parent"]
+        if parent in routes and depth < 32:
+            parent_path = resolve(parent, depth + 1)
+            return None if parent_path is None else _join_route(parent_path, routes[obj])
+        paths = {routes[o] for o in table["routes"]}
+        if table["router"] and not paths & {"*", "/*"}:
+            return None
+        return _join_route("/", routes[obj])
+
+    resolved = (resolve(obj) for obj in routes)
+    return [path for path in resolved if path is not None]
+
+def extract_route_paths(text: str) -> list:
+    """
+    Extrae rutas de página de un documento JSON (p.ej. /items/site_map de
+    Directus) o de código JS (tablas de rutas, sitemap.js, bundles de React).
+    Devuelve las rutas sin duplicados y en orden de aparición.
+    """
+    paths = []
+    try:
+        _walk_json(json.loads(text), paths)
+    except ValueError:
+        paths = extract_router_paths(text) + ROUTE_KEY_PATTERN.findall(text)
+    return list(dict.fromkeys(p for p in paths if is_page_route(p)))
+
+def read_route_list(path: str) -> list:
+    """
+    Lee una lista de rutas o URLs (una por línea, '#' para comentarios).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        lines = (line.split("#", 1)[0].strip() for line in f)
+        return [line for line in lines if line]
+
+def seed_urls(root_url: str, routes) -> list:
+    """
+    Convierte rutas relativas o URLs en URLs absolutas del mismo dominio
+    que root_url, sin fragmentos y sin duplicados.
+    """
+    root_domain = urlparse(root_url).netloc
+    urls = []
+    for route in routes:
+        full = urlparse(urljoin(root_url, route))._replace(fragment="").geturl()
+        if urlparse(full).netloc == root_domain:
+            urls.append(full)
+    return list(dict.fromkeys(urls))
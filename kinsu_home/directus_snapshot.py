@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import hashlib
+import argparse
+from urllib.parse import urlencode, quote
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from concurrent.futures import ThreadPoolExecutor
+
+# ----------------------------------------------------------------
+# CONFIGURACIÓN
+# ----------------------------------------------------------------
+
+# Colecciones que consumen las páginas a través de fetchPageData().
+DEFAULT_COLLECTIONS = ["landing", "politica_privacidad"]
+
+# Colecciones con datos de usuarios: nunca se exportan, ni siquiera con --all
+# (el rol público solo puede crear en ellas, pero por si cambian los permisos)
+EXCLUDED_COLLECTIONS = {"registration", "brokers_onboarding"}
+
+# Carpeta (relativa a html/) donde se escribe la instantánea.
+# fetch_page_data.js la consulta antes de llamar a Directus.
+SNAPSHOT_SUBFOLDER = "static/data"
+MANIFEST_NAME = "manifest.json"
+
+PAGE_LIMIT = 100      # Items por petición paginada
+MAX_WORKERS = 8       # Peticiones concurrentes contra Directus
+TIMEOUT = 30          # Segundos por petición
+
+
+# ----------------------------------------------------------------
+# FUNCIONES AUXILIARES
+# ----------------------------------------------------------------
+
+def directus_get(base_url: str, path: str, params: dict = None) -> dict:
+    """
+    Hace un GET anónimo a la API de Directus y devuelve el JSON decodificado.
+    Sin token a propósito: la instantánea se sirve al público, así que solo
+    debe contener lo que el rol público ya puede leer (colecciones y campos).
+    """
+    url = base_url.rstrip("/") + path
+    if params:
+        url += "?" + urlencode(params)
+    with urlopen(Request(url, headers={"Accept": "application/json"}), timeout=TIMEOUT) as resp:
+        return json.loads(resp.read().decode("utf-8"))
+
+def list_collections(base_url: str) -> list:
+    """
+    Devuelve las colecciones de usuario visibles para el rol público
+    (descarta las internas 'directus_*', las carpetas, que no tienen tabla
+    asociada, y las de EXCLUDED_COLLECTIONS).
+    """
+    data = directus_get(base_url, "/collections")["data"]
+    return [
+        c["collection"] for c in data
+        if not c["collection"].startswith("directus_") and c.get("schema") is not None
+        and c["collection"] not in EXCLUDED_COLLECTIONS
+    ]
+
+def fetch_collection(base_url: str, collection: str, pool: ThreadPoolExecutor) -> list:
+    """
+    Descarga todos los items de una colección. La primera página pide el
+    total (meta=filter_count) y el resto de páginas se piden en paralelo.
+    Devuelve None si el rol público no puede leer la colección.
+    """
+    path = f"/items/{quote(collection)}"
+    try:
+        first = directus_get(base_url, path, {
+            "limit": PAGE_LIMIT, "page": 1, "meta": "filter_count",
+        })
+    except HTTPError as e:
+        if e.code in (401, 403):
+            print(f"[INFO] Sin permiso de lectura pública, se omite: {collection}")
+            return None
+        raise
+    items = list(first["data"] or [])
+    if isinstance(first["data"], dict):
+        # Colección singleton: Directus devuelve un objeto, no una lista
+        return [first["data"]]
+
+    total = (first.get("meta") or {}).get("filter_count") or len(items)
+    pages = range(2, (total + PAGE_LIMIT - 1) // PAGE_LIMIT + 1)
+    futures = [
+        pool.submit(directus_get, base_url, path, {"limit": PAGE_LIMIT, "page": n})
+        for n in pages
+    ]
+    for fut in futures:
+        items.extend(fut.result()["data"])
+    return items
+
+def is_published(item: dict) -> bool:
+    """
+    Solo se publican items con status 'published'. Las colecciones
+    sin campo status se consideran siempre publicadas.
+    """
+    return item.get("status", "published") == "published"
+
+def serialize_item(item: dict) -> bytes:
+    """
+    Serializa el item con la misma forma que la respuesta de
+    /items/{colección}/{id} ({"data": ...}), de modo que fetchPageData
+    lo consume sin cambios.
+    """
+    return json.dumps({"data": item}, ensure_ascii=False, sort_keys=True,
+                      separators=(",", ":")).encode("utf-8")
+
+def write_atomic(path: str, content: bytes):
+    """
+    Escribe en un fichero temporal y lo renombra, para que el servidor
+    estático nunca sirva un JSON a medio escribir.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+def load_manifest(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ----------------------------------------------------------------
+# FUNCIÓN PRINCIPAL
+# ----------------------------------------------------------------
+def build_snapshot(base_url: str, html_folder: str, collections: list = None,
+                   workers: int = MAX_WORKERS) -> dict:
+    """
+    - Descarga en bloque (paginado y concurrente) los items publicados de
+      Directus, con la vista del rol público.
+    - Los escribe como JSON estático en html/static/data/<colección>/<id>.json.
+    - Solo reescribe los items cuyo contenido cambió (hash en manifest.json)
+      y borra los que ya no existen o se despublicaron.
+
+    Devuelve un resumen con los contadores de escritos/sin cambios/borrados.
+    """
+    snapshot_folder = os.path.join(html_folder, SNAPSHOT_SUBFOLDER)
+    manifest_path = os.path.join(snapshot_folder, MANIFEST_NAME)
+    old_manifest = load_manifest(manifest_path)
+    new_manifest = {}
+    stats = {"written": 0, "unchanged": 0, "removed": 0}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if not collections:
+            collections = list_collections(base_url)
+        collections = [c for c in collections if c not in EXCLUDED_COLLECTIONS]
+
+        # Cada colección se descarga en paralelo; dentro de cada una,
+        # sus páginas también comparten el mismo pool.
+        with ThreadPoolExecutor(max_workers=len(collections) or 1) as outer:
+            results = dict(zip(collections, outer.map(
+                lambda c: fetch_collection(base_url, c, pool), collections)))
+
+    for collection, items in results.items():
+        if items is None:
+            continue
+        old_hashes = old_manifest.get(collection, {})
+        hashes = {}
+        for item in items:
+            if "id" not in item or not is_published(item):
+                continue
+            item_id = str(item["id"])
+            content = serialize_item(item)
+            digest = hashlib.sha256(content).hexdigest()
+            hashes[item_id] = digest
+
+            item_path = os.path.join(snapshot_folder, collection, f"{item_id}.json")
+            if old_hashes.get(item_id) == digest and os.path.exists(item_path):
+                stats["unchanged"] += 1
+                continue
+            write_atomic(item_path, content)
+            stats["written"] += 1
+            print(f"[INFO] Actualizado: {collection}/{item_id}")
+
+        for item_id in set(old_hashes) - set(hashes):
+            stale_path = os.path.join(snapshot_folder, collection, f"{item_id}.json")
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+            stats["removed"] += 1
+            print(f"[INFO] Eliminado: {collection}/{item_id}")
+
+        new_manifest[collection] = hashes
+
+    # Colecciones que ya no se exportan: se eliminan sus ficheros
+    for collection in set(old_manifest) - set(new_manifest):
+        for item_id in old_manifest[collection]:
+            stale_path = os.path.join(snapshot_folder, collection, f"{item_id}.json")
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+            stats["removed"] += 1
+
+    write_atomic(manifest_path, json.dumps(new_manifest, indent=2, sort_keys=True).encode("utf-8"))
+    return stats
+
+
+# ----------------------------------------------------------------
+# MAIN
+# ----------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Genera una instantánea estática del contenido publicado en Directus.")
+    parser.add_argument("directus_url", help="URL base de Directus, p.ej. http://127.0.0.1:8055")
+    parser.add_argument("html_folder", help="Carpeta html/ servida (p.ej. ar/html)")
+    parser.add_argument("--collections", default=",".join(DEFAULT_COLLECTIONS),
+                        help="Colecciones separadas por coma (por defecto: %(default)s)")
+    parser.add_argument("--all", action="store_true",
+                        help="Exportar todas las colecciones que el rol público puede leer "
+                             "en lugar de --collections")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="Peticiones concurrentes (por defecto: %(default)s)")
+    args = parser.parse_args()
+
+    collections = None if args.all else [c.strip() for c in args.collections.split(",") if c.strip()]
+
+    try:
+        stats = build_snapshot(args.directus_url, args.html_folder, collections,
+                               workers=args.workers)
+    except Exception as e:
+        print(f"[ERROR] No se pudo generar la instantánea -> {e}")
+        sys.exit(1)
+
+    print(f"[INFO] Instantánea finalizada: {stats['written']} escritos, "
+          f"{stats['unchanged']} sin cambios, {stats['removed']} eliminados.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,555 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import time
+import shutil
+import asyncio
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from urllib.parse import quote
+
+from crawl_seeds import JS_REGEX_LITERAL, REGEX_PRECEDERS
+from verify_mirror import file_kind, start_server
+
+# ----------------------------------------------------------------
+# CONFIGURACIÓN
+# ----------------------------------------------------------------
+# Post-proceso de un sitio espejado antes de publicarlo:
+# - minifica HTML, CSS y JS sin hash en el nombre (los bundles con hash
+#   ya vienen minificados del build de React)
+# - opcional (--critical): calcula en Chromium el CSS crítico de cada página
+#   (reglas que afectan a lo visible sin hacer scroll), lo inserta en un
+#   <style> y difiere las hojas de estilo con preload + noscript
+# - cachea cada resultado por el hash de su entrada: un fichero que no
+#   cambió entre rastreos no se vuelve a procesar
+
+# Se incrementa al cambiar cualquier transformación, para invalidar la caché
+OPTIMIZER_VERSION = 2
+
+CACHE_FOLDER = ".optimize_cache"
+
+# Viewports para el CSS crítico (móvil y escritorio); se une lo visible en todos
+VIEWPORTS = ["390x844", "1366x768"]
+
+# Tiempo máximo de carga por página al calcular el CSS crítico (ms)
+PAGE_TIMEOUT = 15000
+
+# main.8c69d18a.chunk.js, runtime-main.1a2b3c4d.js, vendor.min.js...
+HASHED_JS_PATTERN = re.compile(r"(\.[0-9a-f]{8,}(\.chunk)?|\.min)\.js$", re.IGNORECASE)
+
+CSS_STRING = r""""(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'"""
+CSS_STRING_OR_COMMENT = re.compile(rf"({CSS_STRING})|/\*(?!!).*?\*/", re.DOTALL)
+CSS_STRING_SPLIT = re.compile(rf"({CSS_STRING})", re.DOTALL)
+
+# Bloques cuyo contenido no se toca al colapsar espacios
+# Tokens de JS que no se tocan al minificar (el resto es código y espacios)
+JS_STRING = re.compile(r""""(?:\\[\s\S]|[^"\\\n])*"|'(?:\\[\s\S]|[^'\\\n])*'""")
+JS_TEMPLATE_CHUNK = re.compile(r"(?:\\[\s\S]|\$(?!\{)|[^`\\$])*(`|\$\{)")
+JS_CODE = re.compile(r"""[^\s"'`/{}]+""")
+JS_SPACE = re.compile(r"\s+")
+JS_WORD = re.compile(r"[\w$]+$")
+JS_LINE_BREAKS = ("\n", "\r", "\u2028", "\u2029")
+# Tras estas palabras, '/' abre un literal de regex y no es una división
+JS_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete",
+                     "void", "throw", "instanceof", "yield", "await"}
+
+HTML_RAW_BLOCK = re.compile(r"(<(pre|textarea|script|style)\b[^>]*>.*?</\2\s*>)", re.IGNORECASE | re.DOTALL)
+HTML_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+HTML_STYLE_BLOCK = re.compile(r"(<style\b[^>]*>)(.*?)(</style\s*>)", re.IGNORECASE | re.DOTALL)
+STYLESHEET_LINK = re.compile(r"""<link\b[^>]*\brel\s*=\s*["']?stylesheet["']?[^>]*>""", re.IGNORECASE)
+REL_ATTRIBUTE = re.compile(r"""\brel\s*=\s*["']?stylesheet["']?""", re.IGNORECASE)
+
+# Se ejecuta en la página: devuelve las reglas CSS que afectan a elementos
+# dentro del viewport, con las url() ya absolutas (el CSS cambia de sitio al
+# insertarlo en el HTML)
+CRITICAL_CSS_JS = r"""
+() => {
+  const height = window.innerHeight;
+  const pseudo = /::?(before|after|hover|focus|focus-visible|focus-within|active|visited|placeholder|selection|first-letter|first-line|-webkit-[\w-]+|-moz-[\w-]+)(\([^)]*\))?/g;
+  const visible = (selector) => {
+    let elements;
+    try {
+      elements = document.querySelectorAll(selector.replace(pseudo, "") || "*");
+    } catch (e) {
+      return false;
+    }
+    for (const el of elements) {
+      const rect = el.getBoundingClientRect();
+      if (rect.top < height && rect.bottom >= 0) return true;
+    }
+    return false;
+  };
+  const absolutize = (cssText, base) => cssText.replace(/url\(\s*(['"]?)(.*?)\1\s*\)/g, (match, quote, value) => {
+    if (/^(data:|#)/.test(value)) return match;
+    const url = new URL(value, base);
+    const target = url.origin === location.origin ? url.pathname + url.search : url.href;
+    return `url("${target}")`;
+  });
+  const walk = (rules, base) => {
+    const kept = [];
+    for (const rule of rules) {
+      if (rule instanceof CSSStyleRule) {
+        if (visible(rule.selectorText)) kept.push(absolutize(rule.cssText, base));
+      } else if (rule instanceof CSSMediaRule) {
+        if (window.matchMedia(rule.media.mediaText).matches) {
+          const inner = walk(rule.cssRules, base);
+          if (inner.length) kept.push(`@media ${rule.media.mediaText}{${inner.join("")}}`);
+        }
+      } else if (rule instanceof CSSFontFaceRule) {
+        kept.push(absolutize(rule.cssText, base));
+      }
+    }
+    return kept;
+  };
+  const kept = [];
+  for (const sheet of document.styleSheets) {
+    if (!sheet.href) continue;  // Los <style> ya están en la página
+    try {
+      kept.push(...walk(sheet.cssRules, sheet.href));
+    } catch (e) {
+      // Hoja de otro origen: no se puede leer
+    }
+  }
+  return kept;
+}
+"""
+
+
+# ----------------------------------------------------------------
+# MINIFICACIÓN
+# ----------------------------------------------------------------
+def minify_css(css: str) -> str:
+    """
+    Quita comentarios (salvo /*! licencias */) y espacios sobrantes
+    sin tocar el contenido de los strings.
+    """
+    css = CSS_STRING_OR_COMMENT.sub(lambda m: m.group(1) or "", css)
+    parts = CSS_STRING_SPLIT.split(css)
+    for i in range(0, len(parts), 2):
+        code = re.sub(r"\s+", " ", parts[i])
+        code = re.sub(r"\s*([{};,>])\s*", r"\1", code)
+        # Junto a ':' solo en declaraciones ('{color: red'), porque en un
+        # selector 'a :hover' != 'a:hover'
+        code = re.sub(r"([{;][\w-]+):\s+", r"\1:", code)
+        parts[i] = code.replace(";}", "}")
+    return "".join(parts).strip()
+
+def minify_js(js: str) -> str:
+    """
+    Minificación conservadora para los scripts propios (sin hash). Recorre
+    el código token a token (strings, template literals con ${...}, regex y
+    comentarios) y solo quita comentarios (salvo /*! licencias */), sangrías,
+    líneas vacías y espacios repetidos fuera de ellos. Los saltos de línea se
+    conservan (inserción automática de ';'). Si no sabe leer el fichero, lo
+    devuelve sin cambios.
+    """
+    out = []
+    stack = []       # "{" de bloque u objeto, "`" de un ${...} de template
+    prev = ""        # Último carácter de código, para distinguir regex de división
+    word = ""        # Última palabra de código (return /x/ es una regex)
+    pos, size = 0, len(js)
+
+    def space(text):
+        if any(br in text for br in JS_LINE_BREAKS):
+            if out and out[-1] == " ":
+                out.pop()
+            if out and out[-1] != "\n":
+                out.append("\n")
+        elif out and out[-1] not in (" ", "\n"):
+            out.append(" ")
+
+    def template(pos):
+        """
+        Copia texto de template literal desde 'pos'. Devuelve la posición
+        tras el '`' final o tras '${', o None si no se cierra.
+        """
+        m = JS_TEMPLATE_CHUNK.match(js, pos)
+        if not m:
+            return None
+        out.append(m.group())
+        if m.group(1) == "${":
+            stack.append("`")
+        return m.end()
+
+    if js.startswith("#!"):
+        pos = js.find("\n") if "\n" in js else size
+        out.append(js[:pos])
+
+    while pos < size:
+        char = js[pos]
+        if char.isspace():
+            m = JS_SPACE.match(js, pos)
+            space(m.group())
+            pos = m.end()
+            continue
+        if js.startswith("//", pos):
+            end = js.find("\n", pos)
+            pos = size if end < 0 else end
+            continue
+        if js.startswith("/*", pos):
+            end = js.find("*/", pos + 2)
+            if end < 0:
+                return js
+            comment = js[pos:end + 2]
+            if comment.startswith("/*!"):
+                out.append(comment)
+            else:
+                space(comment[2:-2] or " ")
+            pos = end + 2
+            continue
+
+        if char in "\"'":
+            m = JS_STRING.match(js, pos)
+            if not m:
+                return js
+            out.append(m.group())
+            pos = m.end()
+        elif char == "`":
+            out.append("`")
+            pos = template(pos + 1)
+            if pos is None:
+                return js
+        elif char == "/":
+            literal = None
+            if prev in REGEX_PRECEDERS or word in JS_REGEX_KEYWORDS:
+                literal = JS_REGEX_LITERAL.match(js, pos)
+            out.append(literal.group() if literal else "/")
+            pos = literal.end() if literal else pos + 1
+        elif char == "{":
+            stack.append("{")
+            out.append("{")
+            pos += 1
+        elif char == "}":
+            closes_template = stack and stack.pop() == "`"
+            out.append("}")
+            pos += 1
+            if closes_template:
+                pos = template(pos)
+                if pos is None:
+                    return js
+        else:
+            m = JS_CODE.match(js, pos)
+            out.append(m.group())
+            pos = m.end()
+            tail = JS_WORD.search(m.group())
+            prev, word = m.group()[-1], tail.group() if tail else ""
+            continue
+        prev, word = out[-1][-1], ""
+    return "".join(out).strip()
+
+def minify_html(html: str) -> str:
+    """
+    Quita comentarios (salvo los condicionales de IE) y colapsa espacios,
+    excepto dentro de <pre>, <textarea>, <script> y <style>. El CSS de los
+    <style> se minifica; el JS en línea se deja como está.
+    """
+    parts = HTML_RAW_BLOCK.split(html)
+    result = []
+    # split con dos grupos: [texto, bloque, nombre_etiqueta, texto, ...]
+    for i in range(0, len(parts), 3):
+        result.append(re.sub(r"\s+", " ", HTML_COMMENT.sub("", parts[i])))
+        if i + 1 < len(parts):
+            block, tag = parts[i + 1], parts[i + 2].lower()
+            if tag == "style":
+                block = HTML_STYLE_BLOCK.sub(lambda m: m.group(1) + minify_css(m.group(2)) + m.group(3), block)
+            result.append(block)
+    return "".join(result).strip()
+
+def defer_stylesheets(html: str, critical_css: str) -> str:
+    """
+    Inserta el CSS crítico donde estaba la primera hoja de estilos y
+    convierte cada <link rel=stylesheet> en un preload que se aplica al
+    cargar, con <noscript> para navegadores sin JS.
+    """
+    inserted = False
+
+    def replace(match):
+        nonlocal inserted
+        link = match.group(0)
+        preload = REL_ATTRIBUTE.sub('rel="preload" as="style"', link, count=1)
+        preload = preload[:-1].rstrip("/ ") + """ onload="this.onload=null;this.rel='stylesheet'">"""
+        deferred = f"{preload}<noscript>{link}</noscript>"
+        if not inserted:
+            inserted = True
+            deferred = f"<style data-critical>{critical_css}</style>{deferred}"
+        return deferred
+
+    return STYLESHEET_LINK.sub(replace, html)
+
+def optimize_file(task):
+    """
+    Procesa un fichero en los procesos del pool y guarda el resultado en la
+    caché y en el destino. Devuelve (bytes_entrada, bytes_salida).
+    """
+    kind, src, dest, cache_path, critical_css = task
+    with open(src, "rb") as f:
+        data = f.read()
+    # surrogateescape: los bytes que no son UTF-8 sobreviven al viaje de ida y vuelta
+    text = data.decode("utf-8", errors="surrogateescape")
+    if kind == "html":
+        if critical_css is not None:
+            text = defer_stylesheets(text, minify_css(critical_css))
+        text = minify_html(text)
+    elif kind == "css":
+        text = minify_css(text)
+    else:
+        text = minify_js(text)
+    output = text.encode("utf-8", errors="surrogateescape")
+
+    write_atomic(cache_path, output)
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    shutil.copyfile(cache_path, dest)
+    return len(data), len(output)
+
+
+# ----------------------------------------------------------------
+# FUNCIONES AUXILIARES
+# ----------------------------------------------------------------
+def write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def classify(path: str):
+    """
+    "html", "css", "js" (sin hash) o None para copiar sin cambios.
+    """
+    kind = file_kind(path)
+    if kind:
+        return kind
+    if path.lower().endswith(".js") and not HASHED_JS_PATTERN.search(path):
+        return "js"
+    return None
+
+def cache_key(kind: str, content_hash: str, context: str = "") -> str:
+    """
+    La clave depende de la versión del optimizador, del tipo, del contenido
+    y, para HTML con CSS crítico, de los viewports y de todas las hojas de estilo.
+    """
+    raw = f"{OPTIMIZER_VERSION}:{kind}:{context}:{content_hash}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def cache_path_for(cache_folder: str, key: str) -> str:
+    return os.path.join(cache_folder, key[:2], key)
+
+def list_tree(root: str) -> list:
+    """
+    Rutas relativas de todos los ficheros (sin carpetas ocultas).
+    """
+    files = []
+    for folder, dirs, names in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in names:
+            files.append(os.path.relpath(os.path.join(folder, name), root))
+    return sorted(files)
+
+def prune_dest(dest: str, keep: set) -> int:
+    """
+    Borra de 'dest' los ficheros que ya no están en el origen (páginas que
+    desaparecieron entre rastreos) y las carpetas que quedan vacías.
+    Devuelve cuántos ficheros borró.
+    """
+    removed = 0
+    for rel in list_tree(dest):
+        if rel not in keep:
+            os.remove(os.path.join(dest, rel))
+            removed += 1
+    for folder, _, _ in os.walk(dest, topdown=False):
+        if folder != dest and not os.listdir(folder):
+            os.rmdir(folder)
+    return removed
+
+
+# ----------------------------------------------------------------
+# CSS CRÍTICO
+# ----------------------------------------------------------------
+async def extract_critical_css(root: str, pages: list, viewports: list, workers: int) -> dict:
+    """
+    Carga cada página en Chromium (servida desde el espejo, sin red externa)
+    en cada viewport y devuelve {pagina: css_critico}. Las páginas que fallan
+    o no dan ninguna regla no aparecen en el resultado y se publican sin
+    diferir su CSS.
+    """
+    from playwright.async_api import async_playwright
+
+    server = start_server(root)
+    origin = f"http://127.0.0.1:{server.server_address[1]}"
+    queue = asyncio.Queue()
+    for page_file in pages:
+        queue.put_nowait(page_file)
+    critical = {}
+
+    async def block_network(route, request):
+        if request.url.startswith(origin + "/"):
+            await route.continue_()
+        else:
+            await route.abort("blockedbyclient")
+
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            contexts = []
+            for viewport in viewports:
+                width, height = (int(n) for n in viewport.split("x"))
+                context = await browser.new_context(viewport={"width": width, "height": height})
+                await context.route("**/*", block_network)
+                contexts.append(context)
+
+            async def worker():
+                while not queue.empty():
+                    page_file = queue.get_nowait()
+                    url = f"{origin}/{quote(page_file.replace(os.sep, '/'))}"
+                    rules = []
+                    try:
+                        for context in contexts:
+                            page = await context.new_page()
+                            try:
+                                await page.goto(url, wait_until="networkidle", timeout=PAGE_TIMEOUT)
+                                rules.extend(await page.evaluate(CRITICAL_CSS_JS))
+                            finally:
+                                await page.close()
+                    except Exception as e:
+                        print(f"[ERROR] CSS crítico de {page_file} -> {e}".splitlines()[0])
+                        continue
+                    if not rules:
+                        print(f"[ERROR] CSS crítico de {page_file} -> ninguna regla visible")
+                        continue
+                    critical[page_file] = "".join(dict.fromkeys(rules))
+
+            await asyncio.gather(*(worker() for _ in range(workers)))
+            await browser.close()
+    finally:
+        server.shutdown()
+    return critical
+
+
+# ----------------------------------------------------------------
+# FUNCIÓN PRINCIPAL
+# ----------------------------------------------------------------
+def optimize_mirror(src: str, dest: str, cache_folder: str = CACHE_FOLDER, workers: int = None,
+                    critical: bool = False, viewports: list = None, browser_workers: int = 4) -> dict:
+    """
+    Genera en 'dest' una copia optimizada de 'src'. Devuelve un resumen.
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 4
+    viewports = viewports or VIEWPORTS
+    files = list_tree(src)
+
+    kinds = {rel: classify(os.path.join(src, rel)) for rel in files}
+    hashes = {rel: sha256_file(os.path.join(src, rel)) for rel in files if kinds[rel]}
+
+    # El CSS crítico de una página cambia si cambia cualquier hoja de estilos
+    html_context = ""
+    if critical:
+        css_hashes = sorted(hashes[rel] for rel in files if kinds[rel] == "css")
+        html_context = "critical:" + ",".join(viewports) + ":" + hashlib.sha256(
+            "".join(css_hashes).encode()).hexdigest()
+
+    stats = {"files": len(files), "optimized": 0, "cache_hits": 0, "copied": 0,
+             "bytes_in": 0, "bytes_out": 0}
+    pending = []
+    for rel in files:
+        src_path, dest_path = os.path.join(src, rel), os.path.join(dest, rel)
+        kind = kinds[rel]
+        if kind is None:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            shutil.copy2(src_path, dest_path)
+            stats["copied"] += 1
+            continue
+
+        key = cache_key(kind, hashes[rel], html_context if kind == "html" else "")
+        cached = cache_path_for(cache_folder, key)
+        if os.path.exists(cached):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            shutil.copyfile(cached, dest_path)
+            stats["cache_hits"] += 1
+            stats["bytes_in"] += os.path.getsize(src_path)
+            stats["bytes_out"] += os.path.getsize(cached)
+        else:
+            pending.append((kind, rel, src_path, dest_path, cached))
+
+    critical_css = {}
+    pages = [rel for kind, rel, *_ in pending if kind == "html"]
+    if critical and pages:
+        print(f"[INFO] Calculando CSS crítico de {len(pages)} páginas ({', '.join(viewports)})...")
+        critical_css = asyncio.run(extract_critical_css(src, pages, viewports, browser_workers))
+
+    tasks = []
+    for kind, rel, src_path, dest_path, cached in pending:
+        page_css = critical_css.get(rel) if kind == "html" else None
+        if kind == "html" and critical and not page_css:
+            # Sin CSS crítico (o vacío) no se difieren las hojas (evita pintar sin estilos).
+            # Se cachea con la clave sin CSS crítico para reintentarlo en la
+            # próxima ejecución
+            cached = cache_path_for(cache_folder, cache_key(kind, hashes[rel]))
+            page_css = None
+        tasks.append((kind, src_path, dest_path, cached, page_css))
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            chunksize = max(1, len(tasks) // (workers * 4))
+            for bytes_in, bytes_out in pool.map(optimize_file, tasks, chunksize=chunksize):
+                stats["optimized"] += 1
+                stats["bytes_in"] += bytes_in
+                stats["bytes_out"] += bytes_out
+
+    stats["removed"] = prune_dest(dest, set(files))
+    stats["elapsed"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+# ----------------------------------------------------------------
+# MAIN
+# ----------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Minifica un sitio espejado e inserta su CSS crítico.")
+    parser.add_argument("src", help="Carpeta del espejo (p.ej. descarga_offline/kinsu.mx)")
+    parser.add_argument("dest", help="Carpeta de salida (se crea si no existe)")
+    parser.add_argument("--critical", action="store_true",
+                        help="Insertar el CSS crítico por página y diferir el resto (requiere Chromium)")
+    parser.add_argument("--viewport", action="append", dest="viewports",
+                        help=f"Viewport ANCHOxALTO para el CSS crítico, repetible (por defecto: {' '.join(VIEWPORTS)})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4,
+                        help="Procesos de minificación (por defecto: %(default)s)")
+    parser.add_argument("--browser-workers", type=int, default=4,
+                        help="Páginas cargadas a la vez con --critical (por defecto: %(default)s)")
+    parser.add_argument("--cache", default=CACHE_FOLDER,
+                        help="Carpeta de la caché por hash (por defecto: %(default)s)")
+    args = parser.parse_args()
+
+    src, dest = os.path.abspath(args.src), os.path.abspath(args.dest)
+    if not os.path.isdir(src):
+        print(f"[ERROR] No existe la carpeta {args.src}")
+        sys.exit(2)
+    if os.path.commonpath([src, dest]) in (src, dest):
+        print("[ERROR] El destino no puede estar dentro del origen (ni al revés)")
+        sys.exit(2)
+    for viewport in args.viewports or []:
+        if not re.fullmatch(r"\d+x\d+", viewport):
+            print(f"[ERROR] Viewport inválido: {viewport} (formato ANCHOxALTO)")
+            sys.exit(2)
+
+    stats = optimize_mirror(src, dest, args.cache, args.workers, args.critical,
+                            args.viewports, args.browser_workers)
+    saved = stats["bytes_in"] - stats["bytes_out"]
+    print(f"[INFO] {stats['files']} ficheros en {stats['elapsed']}s: {stats['optimized']} optimizados, "
+          f"{stats['cache_hits']} desde caché, {stats['copied']} copiados sin cambios, "
+          f"{stats['removed']} borrados del destino")
+    print(f"[INFO] HTML/CSS/JS: {stats['bytes_in']} -> {stats['bytes_out']} bytes ({saved} menos)")
+
+
+if __name__ == "__main__":
+    main()
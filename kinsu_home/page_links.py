@@ -0,0 +1,55 @@
+# ----------------------------------------------------------------
+# EXTRACCIÓN DE ENLACES EN EL NAVEGADOR
+# ----------------------------------------------------------------
+# Compartido por los spiders: un solo page.evaluate por página en lugar de
+# un query_selector_all + get_attribute por cada enlace.
+#
+#   page.evaluate(EXTRACT_LINKS_JS, False) -> {"links": [...], "routes": [...]}
+#   page.evaluate(EXTRACT_LINKS_JS, True)  -> además "resources": [[url, tipo], ...]
+#
+# Devuelve URLs absolutas, sin fragmento y sin duplicados. Los recursos
+# (src, srcset, <link href>) solo se recorren si se piden; su tipo sale de
+# la etiqueta, con los nombres de Playwright (script, stylesheet, image...).
+
+EXTRACT_LINKS_JS = r"""
+(withResources) => {
+    const links = new Set();
+    const resources = new Map();   // url -> tipo
+    const routes = new Set();
+    const add = (set, value) => {
+        if (!value) return;
+        try {
+            const url = new URL(value, document.baseURI);
+            url.hash = '';
+            set.add(url.href);
+        } catch (e) { /* URL inválida */ }
+    };
+    document.querySelectorAll('a[href], area[href]').forEach(el => add(links, el.getAttribute('href')));
+    document.querySelectorAll('[data-href], [data-to], [data-route], [routerlink]').forEach(el => add(routes,
+        el.getAttribute('data-href') || el.getAttribute('data-to') ||
+        el.getAttribute('data-route') || el.getAttribute('routerlink')));
+    if (!withResources) {
+        return {links: [...links], routes: [...routes]};
+    }
+    const tagTypes = {SCRIPT: 'script', IMG: 'image', SOURCE: 'image', INPUT: 'image',
+                      VIDEO: 'media', AUDIO: 'media', TRACK: 'media', IFRAME: 'document'};
+    const preloadTypes = {style: 'stylesheet', script: 'script', font: 'font', image: 'image'};
+    const addResource = (value, type) => {
+        const found = new Set();
+        add(found, value);
+        found.forEach(url => { if (!resources.has(url)) resources.set(url, type); });
+    };
+    document.querySelectorAll('[src]').forEach(el =>
+        addResource(el.getAttribute('src'), tagTypes[el.tagName] || 'other'));
+    document.querySelectorAll('[srcset]').forEach(el => el.getAttribute('srcset').split(',')
+        .forEach(candidate => addResource(candidate.trim().split(/\s+/)[0], 'image')));
+    document.querySelectorAll('link[href]:not([rel~="canonical"]):not([rel~="alternate"])').forEach(el => {
+        const rel = el.relList;
+        const type = rel.contains('stylesheet') ? 'stylesheet'
+            : rel.contains('icon') ? 'image'
+            : preloadTypes[el.getAttribute('as')] || 'other';
+        addResource(el.getAttribute('href'), type);
+    });
+    return {links: [...links], resources: [...resources], routes: [...routes]};
+}
+"""
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# ----------------------------------------------------------------
+# CONFIGURACIÓN
+# ----------------------------------------------------------------
+# Publica un sitio (ar/html, br/html o la salida de un spider) como una
+# release versionada, sin cortar el servicio:
+#
+#   releases/
+#     20261019-120000/         release inmutable + .release_manifest.json (ruta -> sha256)
+#     20261019-130500/
+#     current -> 20261019-130500   enlace que sirve python_server
+#
+# - se compara cada fichero por hash con la release actual: los que no
+#   cambiaron se enlazan (hardlink, sin copiar bytes) y solo se copian los nuevos
+# - la release se monta en una carpeta temporal y se renombra al terminar
+# - 'current' se cambia con os.replace sobre un enlace nuevo, que es atómico:
+#   cada petición ve la release anterior completa o la nueva completa
+# - se conservan las últimas releases para volver atrás al instante (--rollback)
+# - cada activación se anota en .release_history: --rollback vuelve a la
+#   release que estaba activa antes, no a la de id anterior
+
+CURRENT_LINK = "current"
+# Oculto para no chocar con el manifest.json de la web (PWA)
+MANIFEST_NAME = ".release_manifest.json"
+STAGING_PREFIX = ".staging-"
+HISTORY_NAME = ".release_history"
+
+# Activaciones que se recuerdan en el historial
+HISTORY_LIMIT = 100
+
+# 20261019-120000 o 20261019-120000-2 (varias publicaciones en el mismo segundo)
+RELEASE_ID_PATTERN = re.compile(r"(\d{8}-\d{6})(?:-(\d+))?")
+
+# Releases que se conservan (incluida la actual)
+KEEP_RELEASES = 3
+
+HASH_WORKERS = 8
+
+
+# ----------------------------------------------------------------
+# FUNCIONES AUXILIARES
+# ----------------------------------------------------------------
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def build_manifest(root: str) -> dict:
+    """
+    {ruta_relativa: sha256} de todos los ficheros (sin ocultos).
+    El hash se calcula en hilos: hashlib libera el GIL con bloques grandes.
+    """
+    paths = []
+    for folder, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            if not name.startswith("."):
+                paths.append(os.path.relpath(os.path.join(folder, name), root))
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+        digests = pool.map(lambda rel: sha256_file(os.path.join(root, rel)), paths)
+        return dict(zip(paths, digests))
+
+def release_sort_key(release_id: str) -> tuple:
+    """
+    Orden por fecha y sufijo numérico ('-10' va después de '-2').
+    """
+    m = RELEASE_ID_PATTERN.fullmatch(release_id)
+    if not m:
+        return (release_id, 0)
+    return (m.group(1), int(m.group(2) or 1))
+
+def list_releases(releases_dir: str) -> list:
+    """
+    Ids de release ordenados del más antiguo al más reciente.
+    """
+    if not os.path.isdir(releases_dir):
+        return []
+    return sorted((
+        name for name in os.listdir(releases_dir)
+        if not name.startswith(".") and name != CURRENT_LINK
+        and os.path.isdir(os.path.join(releases_dir, name))
+    ), key=release_sort_key)
+
+def current_release(releases_dir: str):
+    link = os.path.join(releases_dir, CURRENT_LINK)
+    if not os.path.islink(link):
+        return None
+    return os.path.basename(os.readlink(link))
+
+def load_manifest(release_dir: str) -> dict:
+    path = os.path.join(release_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def new_release_id(releases_dir: str) -> str:
+    """
+    Id por fecha; si ya hay releases de ese segundo, sufijo mayor que todos
+    los usados (también los ya borrados, que siguen en el historial).
+    """
+    release_id = time.strftime("%Y%m%d-%H%M%S")
+    used = set(list_releases(releases_dir)) | set(load_history(releases_dir))
+    suffixes = [release_sort_key(r)[1] for r in used if release_sort_key(r)[0] == release_id]
+    if not suffixes:
+        return release_id
+    return f"{release_id}-{max(suffixes) + 1}"
+
+def link_or_copy(src: str, dest: str) -> bool:
+    """
+    Hardlink si el sistema lo permite, copia si no. Devuelve True si enlazó.
+    """
+    try:
+        os.link(src, dest)
+        return True
+    except OSError:
+        shutil.copy2(src, dest)
+        return False
+
+def switch_current(releases_dir: str, release_id: str):
+    """
+    Apunta 'current' a la release de forma atómica. El enlace es relativo
+    para que funcione igual dentro del contenedor.
+    """
+    tmp_link = os.path.join(releases_dir, f".{CURRENT_LINK}.tmp")
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(release_id, tmp_link)
+    os.replace(tmp_link, os.path.join(releases_dir, CURRENT_LINK))
+
+def load_history(releases_dir: str) -> list:
+    """
+    Ids activados, del más antiguo al más reciente (uno por línea).
+    """
+    path = os.path.join(releases_dir, HISTORY_NAME)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def save_history(releases_dir: str, history: list):
+    path = os.path.join(releases_dir, HISTORY_NAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("".join(f"{release_id}\n" for release_id in history[-HISTORY_LIMIT:]))
+    os.replace(tmp_path, path)
+
+def activate(releases_dir: str, release_id: str):
+    """
+    Cambia 'current' y anota la activación en el historial.
+    """
+    switch_current(releases_dir, release_id)
+    save_history(releases_dir, load_history(releases_dir) + [release_id])
+
+def prune_releases(releases_dir: str, keep: int) -> list:
+    """
+    Borra las releases activadas hace más tiempo (o nunca), nunca la actual,
+    para que --rollback siga encontrando las recientes. Devuelve las borradas.
+    """
+    current = current_release(releases_dir)
+    last_active = {release_id: i for i, release_id in enumerate(load_history(releases_dir))}
+    releases = sorted((r for r in list_releases(releases_dir) if r != current),
+                      key=lambda r: (last_active.get(r, -1), release_sort_key(r)))
+    removed = releases[:max(0, len(releases) - (keep - 1))]
+    for release_id in removed:
+        shutil.rmtree(os.path.join(releases_dir, release_id))
+    return removed
+
+def clean_staging(releases_dir: str):
+    """
+    Restos de publicaciones interrumpidas.
+    """
+    for name in os.listdir(releases_dir):
+        if name.startswith(STAGING_PREFIX):
+            shutil.rmtree(os.path.join(releases_dir, name), ignore_errors=True)
+
+
+# ----------------------------------------------------------------
+# FUNCIÓN PRINCIPAL
+# ----------------------------------------------------------------
+def publish(source: str, releases_dir: str, keep: int = KEEP_RELEASES,
+            force: bool = False, dry_run: bool = False) -> dict:
+    """
+    Publica 'source' como nueva release y la activa. Devuelve un resumen.
+    """
+    started = time.perf_counter()
+    os.makedirs(releases_dir, exist_ok=True)
+    clean_staging(releases_dir)
+
+    manifest = build_manifest(source)
+    current = current_release(releases_dir)
+    current_dir = os.path.join(releases_dir, current) if current else None
+    previous = load_manifest(current_dir) if current_dir else {}
+
+    changed = {rel for rel, digest in manifest.items() if previous.get(rel) != digest}
+    unchanged = [rel for rel in manifest if rel not in changed]
+    removed = [rel for rel in previous if rel not in manifest]
+    summary = {
+        "release": None,
+        "previous": current,
+        "files": len(manifest),
+        "changed": len(changed),
+        "unchanged": len(unchanged),
+        "removed": len(removed),
+        "bytes_copied": sum(os.path.getsize(os.path.join(source, rel)) for rel in changed),
+    }
+
+    if dry_run or (current and not changed and not removed and not force):
+        summary["elapsed"] = round(time.perf_counter() - started, 3)
+        return summary
+
+    release_id = new_release_id(releases_dir)
+    staging = os.path.join(releases_dir, STAGING_PREFIX + release_id)
+    linked = 0
+    for rel in sorted(manifest):
+        dest = os.path.join(staging, rel)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        if rel in changed:
+            shutil.copy2(os.path.join(source, rel), dest)
+        else:
+            # Las releases son inmutables, así que compartir el inodo es seguro
+            linked += link_or_copy(os.path.join(current_dir, rel), dest)
+
+    with open(os.path.join(staging, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=0, sort_keys=True)
+
+    os.rename(staging, os.path.join(releases_dir, release_id))
+    activate(releases_dir, release_id)
+
+    summary["release"] = release_id
+    summary["hardlinked"] = linked
+    summary["pruned"] = prune_releases(releases_dir, keep)
+    summary["elapsed"] = round(time.perf_counter() - started, 3)
+    return summary
+
+def rollback(releases_dir: str, target: str = None) -> str:
+    """
+    Vuelve a la release que estaba activa antes de la actual (o a 'target').
+    Deshacer saca la activación actual del historial, así que varios
+    --rollback seguidos van retrocediendo. Devuelve el id activado.
+    """
+    releases = list_releases(releases_dir)
+    current = current_release(releases_dir)
+    if target is not None:
+        if target not in releases:
+            raise ValueError(f"No existe la release {target}")
+        activate(releases_dir, target)
+        return target
+
+    history = [r for r in load_history(releases_dir) if r in releases]
+    while history and history[-1] == current:
+        history.pop()
+    if not history:
+        # Releases publicadas antes de que existiera el historial
+        history = [r for r in releases
+                   if current is None or release_sort_key(r) < release_sort_key(current)]
+        if not history:
+            raise ValueError("No hay una release anterior a la actual")
+    target = history[-1]
+    switch_current(releases_dir, target)
+    save_history(releases_dir, history)
+    return target
+
+
+# ----------------------------------------------------------------
+# MAIN
+# ----------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Publica un sitio como release versionada y atómica.")
+    parser.add_argument("source", nargs="?", help="Carpeta a publicar (p.ej. ar/html o la salida de optimize_mirror.py)")
+    parser.add_argument("releases", help="Carpeta de releases (p.ej. ar/releases)")
+    parser.add_argument("--keep", type=int, default=KEEP_RELEASES,
+                        help="Releases que se conservan, incluida la actual (por defecto: %(default)s)")
+    parser.add_argument("--force", action="store_true", help="Publicar aunque no haya cambios")
+    parser.add_argument("--dry-run", action="store_true", help="Mostrar los cambios sin publicar")
+    parser.add_argument("--rollback", action="store_true",
+                        help="Volver a la release activa antes de la actual sin publicar nada")
+    parser.add_argument("--to", metavar="RELEASE",
+                        help="Con --rollback, activar esta release en lugar de la anterior")
+    parser.add_argument("--list", action="store_true", help="Listar las releases")
+    args = parser.parse_args()
+
+    if args.to and not args.rollback:
+        print("[ERROR] --to solo se usa junto a --rollback")
+        sys.exit(2)
+    if args.keep < 2:
+        print("[ERROR] --keep debe ser al menos 2 para poder volver atrás")
+        sys.exit(2)
+
+    if args.list:
+        current = current_release(args.releases)
+        for release_id in list_releases(args.releases):
+            print(f"{'*' if release_id == current else ' '} {release_id}")
+        return
+
+    if args.rollback:
+        try:
+            release_id = rollback(args.releases, args.to)
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+        print(f"[INFO] 'current' apunta ahora a {release_id}")
+        return
+
+    if not args.source or not os.path.isdir(args.source):
+        print(f"[ERROR] No existe la carpeta a publicar: {args.source}")
+        sys.exit(2)
+
+    summary = publish(args.source, args.releases, args.keep, args.force, args.dry_run)
+    print(f"[INFO] {summary['files']} ficheros: {summary['changed']} cambiados "
+          f"({summary['bytes_copied']} bytes), {summary['unchanged']} sin cambios, "
+          f"{summary['removed']} eliminados")
+    if summary["release"]:
+        print(f"[INFO] Release {summary['release']} activa en {summary['elapsed']}s "
+              f"(anterior: {summary['previous'] or 'ninguna'})")
+        if summary["pruned"]:
+            print(f"[INFO] Releases borradas: {', '.join(summary['pruned'])}")
+    elif not args.dry_run:
+        print("[INFO] Sin cambios: no se crea release (usa --force para forzarla)")
+
+
+if __name__ == "__main__":
+    main()
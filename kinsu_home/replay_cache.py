@@ -0,0 +1,115 @@
+import os
+import json
+import hashlib
+from collections import namedtuple
+
+# ----------------------------------------------------------------
+# ALMACÉN DE GRABACIÓN / REPRODUCCIÓN DE RED (estilo HAR)
+# ----------------------------------------------------------------
+# En modo "record" cada respuesta que ve el spider se guarda como
+#   clave de petición -> status, cabeceras y cuerpo
+# y en modo "replay" se sirven todas desde aquí, sin tocar la red.
+#
+# Estructura en disco:
+#   <carpeta>/index.jsonl      una línea JSON por respuesta grabada
+#   <carpeta>/bodies/<sha256>  cuerpos, direccionados por contenido
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Cabeceras que dejan de ser ciertas al guardar el cuerpo ya decodificado
+DROPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+StoredResponse = namedtuple("StoredResponse", ["status", "headers", "body"])
+
+
+def request_key(method: str, url: str, post_data: bytes = None) -> str:
+    """
+    'GET https://kinsu.mx/static/js/main.js'. Para peticiones con cuerpo
+    (POST de GraphQL, formularios...) se añade el hash del cuerpo.
+    """
+    key = f"{method.upper()} {url}"
+    if post_data:
+        key += " " + hashlib.sha256(post_data).hexdigest()
+    return key
+
+
+class ReplayStore:
+    """
+    Almacén de respuestas grabadas. Se abre en modo RECORD o REPLAY.
+    """
+
+    def __init__(self, folder: str, mode: str):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Modo de replay desconocido: {mode}")
+        self.folder = folder
+        self.mode = mode
+        self.bodies_folder = os.path.join(folder, "bodies")
+        self.index_path = os.path.join(folder, "index.jsonl")
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+        if mode == REPLAY and not os.path.exists(self.index_path):
+            raise FileNotFoundError(f"No hay grabación en {folder}")
+        os.makedirs(self.bodies_folder, exist_ok=True)
+        self._load()
+        self._index = open(self.index_path, "a", encoding="utf-8") if mode == RECORD else None
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    # La última grabación de una clave es la que vale
+                    self.entries[entry["key"]] = entry
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+    def get(self, method: str, url: str, post_data: bytes = None):
+        """
+        Devuelve la StoredResponse grabada o None si la petición no se grabó.
+        """
+        entry = self.entries.get(request_key(method, url, post_data))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with open(os.path.join(self.bodies_folder, entry["body"]), "rb") as f:
+            body = f.read()
+        return StoredResponse(entry["status"], entry["headers"], body)
+
+    def put(self, method: str, url: str, post_data: bytes, status: int, headers: dict, body: bytes):
+        """
+        Graba una respuesta. Los cuerpos repetidos se guardan una sola vez.
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        body_path = os.path.join(self.bodies_folder, digest)
+        if not os.path.exists(body_path):
+            with open(body_path, "wb") as f:
+                f.write(body)
+
+        entry = {
+            "key": request_key(method, url, post_data),
+            "url": url,
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS},
+            "body": digest,
+        }
+        self.entries[entry["key"]] = entry
+        self._index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._index.flush()
+
+    def close(self):
+        if self._index is not None:
+            self._index.close()
+            self._index = None
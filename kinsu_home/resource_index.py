@@ -0,0 +1,70 @@
+import os
+import sqlite3
+
+# ----------------------------------------------------------------
+# ÍNDICE DE RECURSOS EN DISCO
+# ----------------------------------------------------------------
+# Sustituye al dict 'resource_map' (URL original -> ruta local) para que la
+# memoria no crezca con el número de recursos del sitio. Es un SQLite en
+# modo WAL: el spider escribe y los procesos de reescritura leen a la vez.
+
+
+class ResourceIndex:
+    """
+    Mapa persistente URL original -> ruta local, con la interfaz mínima
+    de un dict (in, [], get, len).
+    """
+
+    def __init__(self, path: str, reset: bool = False, readonly: bool = False):
+        self.path = path
+        if reset and os.path.exists(path):
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # isolation_level=None: cada escritura es visible enseguida para los lectores
+            self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=OFF")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS resources (url TEXT PRIMARY KEY, path TEXT NOT NULL)")
+
+    def __contains__(self, url: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM resources WHERE url = ?", (url,)).fetchone() is not None
+
+    def __setitem__(self, url: str, local_path: str):
+        self.conn.execute("INSERT OR REPLACE INTO resources (url, path) VALUES (?, ?)", (url, local_path))
+
+    def __getitem__(self, url: str) -> str:
+        local_path = self.get(url)
+        if local_path is None:
+            raise KeyError(url)
+        return local_path
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM resources").fetchone()[0]
+
+    def get(self, url: str, default: str = None) -> str:
+        row = self.conn.execute("SELECT path FROM resources WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else default
+
+    def lookup(self, urls) -> dict:
+        """
+        Resuelve un lote de URLs de una vez. Devuelve solo las que existen.
+        """
+        urls = list(urls)
+        found = {}
+        # SQLite limita el número de parámetros por consulta
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            found.update(self.conn.execute(
+                f"SELECT url, path FROM resources WHERE url IN ({placeholders})", chunk))
+        return found
+
+    def close(self):
+        self.conn.close()
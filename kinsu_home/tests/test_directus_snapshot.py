@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote
+
+# Los scripts de kinsu_home se importan entre sí por nombre de módulo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import directus_snapshot
+from directus_snapshot import PAGE_LIMIT, SNAPSHOT_SUBFOLDER, build_snapshot
+
+# ----------------------------------------------------------------
+# DIRECTUS DE PRUEBA
+# ----------------------------------------------------------------
+# Responde /collections y /items/<colección> como el rol público de
+# Directus: listas paginadas con limit/page/meta=filter_count, singletons
+# como objeto y 403 en las colecciones sin permiso de lectura.
+
+class StubDirectus(BaseHTTPRequestHandler):
+    collections = {}       # colección -> lista de items o dict (singleton)
+    forbidden = {}         # colección -> código HTTP (401/403)
+    requested = []         # colecciones pedidas a /items
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        if parsed.path == "/collections":
+            names = list(self.collections) + list(self.forbidden)
+            data = [{"collection": name, "schema": {}} for name in names]
+            data += [{"collection": "directus_users", "schema": {}},
+                     {"collection": "carpeta", "schema": None}]
+            return self.send_json(200, {"data": data})
+
+        if not parsed.path.startswith("/items/"):
+            return self.send_json(404, {"errors": []})
+        collection = unquote(parsed.path[len("/items/"):])
+        self.requested.append(collection)
+        if collection in self.forbidden:
+            return self.send_json(self.forbidden[collection], {"errors": [{"message": "Forbidden"}]})
+        items = self.collections.get(collection)
+        if items is None:
+            return self.send_json(403, {"errors": []})
+        if isinstance(items, dict):
+            return self.send_json(200, {"data": items})
+
+        limit = int(params.get("limit", ["100"])[0])
+        page = int(params.get("page", ["1"])[0])
+        body = {"data": items[(page - 1) * limit:page * limit]}
+        if params.get("meta") == ["filter_count"]:
+            body["meta"] = {"filter_count": len(items)}
+        self.send_json(200, body)
+
+    def send_json(self, status: int, body: dict):
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def landing_items(count: int) -> list:
+    # Uno de cada diez en borrador: no debe llegar a la instantánea
+    return [{"id": i, "status": "draft" if i % 10 == 0 else "published", "title": f"Página {i}"}
+            for i in range(1, count + 1)]
+
+
+class DirectusSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        handler = type("Handler", (StubDirectus,), {
+            "collections": {
+                "landing": landing_items(PAGE_LIMIT * 2 + 5),
+                "ajustes": {"id": 1, "telefono": "+54 11 0000-0000"},
+                "registration": [{"id": 1, "email": "persona@example.com"}],
+            },
+            "forbidden": {"privada": 403, "interna": 401},
+            "requested": [],
+        })
+        self.handler = handler
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.html = self.tmp.name
+        self.snapshot = os.path.join(self.html, SNAPSHOT_SUBFOLDER)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def snapshot_files(self, collection: str) -> set:
+        folder = os.path.join(self.snapshot, collection)
+        return set(os.listdir(folder)) if os.path.isdir(folder) else set()
+
+    def test_all_collections_paginates_and_skips_private(self):
+        stats = build_snapshot(self.base_url, self.html, None, workers=4)
+
+        published = {f"{i}.json" for i in range(1, PAGE_LIMIT * 2 + 6) if i % 10}
+        self.assertEqual(self.snapshot_files("landing"), published)
+        self.assertEqual(self.snapshot_files("ajustes"), {"1.json"})
+        with open(os.path.join(self.snapshot, "ajustes", "1.json"), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["data"]["telefono"], "+54 11 0000-0000")
+
+        for collection in ("privada", "interna", "registration", "directus_users", "carpeta"):
+            self.assertEqual(self.snapshot_files(collection), set())
+        # Las colecciones excluidas ni siquiera se piden
+        self.assertNotIn("registration", self.handler.requested)
+        self.assertEqual(self.handler.requested.count("landing"), 3)
+        self.assertEqual(stats, {"written": len(published) + 1, "unchanged": 0, "removed": 0})
+
+    def test_excluded_collections_are_never_requested(self):
+        build_snapshot(self.base_url, self.html, ["landing", "registration"], workers=4)
+        self.assertNotIn("registration", self.handler.requested)
+        self.assertEqual(self.snapshot_files("registration"), set())
+        self.assertIn("registration", directus_snapshot.EXCLUDED_COLLECTIONS)
+
+    def test_incremental_snapshot(self):
+        build_snapshot(self.base_url, self.html, ["landing", "ajustes"], workers=4)
+        unchanged_path = os.path.join(self.snapshot, "landing", "2.json")
+        os.utime(unchanged_path, (0, 0))
+
+        items = self.handler.collections["landing"]
+        items[2]["title"] = "Título nuevo"        # id 3: cambia
+        items[3]["status"] = "archived"           # id 4: se despublica
+        del items[4]                              # id 5: se borra
+        stats = build_snapshot(self.base_url, self.html, ["landing", "ajustes"], workers=4)
+
+        self.assertEqual(stats["written"], 1)
+        self.assertEqual(stats["removed"], 2)
+        files = self.snapshot_files("landing")
+        self.assertNotIn("4.json", files)
+        self.assertNotIn("5.json", files)
+        with open(os.path.join(self.snapshot, "landing", "3.json"), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["data"]["title"], "Título nuevo")
+        # Los items sin cambios no se reescriben
+        self.assertEqual(os.path.getmtime(unchanged_path), 0)
+
+        # Una colección que deja de exportarse se borra entera
+        stats = build_snapshot(self.base_url, self.html, ["landing"], workers=4)
+        self.assertEqual(self.snapshot_files("ajustes"), set())
+        self.assertEqual(stats["removed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from functools import lru_cache, partial
+from html.parser import HTMLParser
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urlparse, unquote, quote
+
+# ----------------------------------------------------------------
+# CONFIGURACIÓN
+# ----------------------------------------------------------------
+# Comprueba que un sitio espejado (ar/html, br/html o la salida de un spider)
+# funciona sin red:
+# - análisis estático: cada HTML y CSS se analiza en un pool de procesos y
+#   cada referencia local (src, href, srcset, url(), @import...) se resuelve
+#   contra el disco, como lo haría python_server
+# - opcional (--browser): cada página se carga en Chromium sin red, servida
+#   desde la propia carpeta, y se cuentan las peticiones fallidas
+
+HTML_EXTENSIONS = (".html", ".htm")
+CSS_EXTENSIONS = (".css",)
+
+CSS_URL_PATTERN = re.compile(r"""url\(\s*(['"]?)(.*?)\1\s*\)""", re.IGNORECASE)
+CSS_IMPORT_PATTERN = re.compile(r"""@import\s+(['"])(.*?)\1""", re.IGNORECASE)
+
+# Firmas de los formatos de imagen que usa el sitio
+IMAGE_MAGIC = (b"\x89PNG", b"\xff\xd8\xff", b"GIF8", b"RIFF", b"\x00\x00\x01\x00", b"<svg", b"<?xml", b"BM")
+
+# Tiempo máximo de carga por página en modo navegador (ms)
+PAGE_TIMEOUT = 15000
+
+
+# ----------------------------------------------------------------
+# FUNCIONES AUXILIARES
+# ----------------------------------------------------------------
+def looks_like_html(head: bytes) -> bool:
+    head = head.lstrip().lower()
+    return head.startswith((b"<!doctype html", b"<html"))
+
+@lru_cache(maxsize=None)
+def sniff(path: str):
+    """
+    (tamaño, tipo) de un fichero del espejo: "html", "image" u "other".
+    Se cachea por proceso porque los mismos recursos aparecen en todas las páginas.
+    """
+    with open(path, "rb") as f:
+        head = f.read(256)
+    if looks_like_html(head):
+        kind = "html"
+    elif head.startswith(IMAGE_MAGIC) or head[4:8] == b"ftyp":
+        kind = "image"
+    else:
+        kind = "other"
+    return os.path.getsize(path), kind
+
+def file_kind(path: str):
+    """
+    "html", "css" o None. Los spiders guardan rutas sin extensión
+    (p.ej. 'blog'), así que esos ficheros se identifican por su contenido.
+    """
+    lower = path.lower()
+    if lower.endswith(HTML_EXTENSIONS):
+        return "html"
+    if lower.endswith(CSS_EXTENSIONS):
+        return "css"
+    if not os.path.splitext(lower)[1]:
+        try:
+            with open(path, "rb") as f:
+                if looks_like_html(f.read(256)):
+                    return "html"
+        except OSError:
+            pass
+    return None
+
+def css_references(css_text: str) -> list:
+    refs = [m.group(2) for m in CSS_URL_PATTERN.finditer(css_text)]
+    refs += [m.group(2) for m in CSS_IMPORT_PATTERN.finditer(css_text)]
+    return [("css", ref, "other") for ref in refs]
+
+
+class ReferenceParser(HTMLParser):
+    """
+    Recoge las referencias de un HTML como (etiqueta, valor, tipo esperado).
+    El tipo esperado ("js", "css", "image", "document", "other") sirve para
+    detectar recursos cruzados (p.ej. un <script> que apunta a un HTML).
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.refs = []
+        self.in_style = False
+
+    def add(self, tag, value, expected):
+        if value is not None:
+            self.refs.append((tag, value.strip(), expected))
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "script":
+            self.add(tag, attrs.get("src"), "js")
+        elif tag == "link":
+            rel = (attrs.get("rel") or "").lower()
+            if "stylesheet" in rel or attrs.get("as") == "style":
+                expected = "css"
+            elif "icon" in rel or attrs.get("as") == "image":
+                expected = "image"
+            elif attrs.get("as") == "script" or "modulepreload" in rel:
+                expected = "js"
+            elif rel in ("canonical", "alternate", "dns-prefetch", "preconnect", "manifest"):
+                return
+            else:
+                expected = "other"
+            self.add(tag, attrs.get("href"), expected)
+        elif tag in ("img", "source", "input"):
+            self.add(tag, attrs.get("src"), "image" if tag != "source" else "other")
+            for candidate in (attrs.get("srcset") or "").split(","):
+                if candidate.strip():
+                    self.add(tag, candidate.split()[0], "image")
+        elif tag in ("video", "audio", "track", "embed"):
+            self.add(tag, attrs.get("src"), "other")
+            self.add(tag, attrs.get("poster"), "image")
+        elif tag in ("iframe", "frame"):
+            self.add(tag, attrs.get("src"), "document")
+        elif tag in ("a", "area"):
+            self.add(tag, attrs.get("href"), "document")
+        elif tag == "object":
+            self.add(tag, attrs.get("data"), "other")
+        elif tag == "style":
+            self.in_style = True
+
+        if attrs.get("style"):
+            self.refs.extend(css_references(attrs["style"]))
+
+    def handle_endtag(self, tag):
+        if tag == "style":
+            self.in_style = False
+
+    def handle_data(self, data):
+        if self.in_style:
+            self.refs.extend(css_references(data))
+
+
+def resolve_reference(root: str, source_path: str, ref: str):
+    """
+    Devuelve (ruta_en_disco, None) si la referencia es local,
+    (None, "remote") si apunta a otro servidor o (None, None) si no aplica.
+    Las rutas absolutas ('/static/...') se resuelven contra la raíz del espejo.
+    """
+    if not ref or ref.startswith("#"):
+        return None, None
+    parsed = urlparse(ref)
+    if parsed.scheme in ("http", "https") or ref.startswith("//"):
+        return None, "remote"
+    if parsed.scheme:
+        return None, None   # data:, mailto:, tel:, javascript:...
+    path = unquote(parsed.path)
+    if not path:
+        return None, None   # Solo query o fragmento: apunta a la propia página
+    if path.startswith("/"):
+        target = os.path.join(root, path.lstrip("/"))
+    else:
+        target = os.path.join(os.path.dirname(source_path), path)
+    return os.path.normpath(target), None
+
+def check_reference(root: str, target: str, expected: str):
+    """
+    Motivo del fallo ("outside", "missing", "empty", "mismatch") o None si es válida.
+    """
+    if os.path.commonpath([root, target]) != root:
+        return "outside"
+    if os.path.isdir(target):
+        # http.server sirve index.html al pedir una carpeta
+        target = os.path.join(target, "index.html")
+    if not os.path.isfile(target):
+        return "missing"
+    size, kind = sniff(target)
+    if size == 0:
+        return "empty"
+    # El fallback de SPA o un nombre aplanado repetido deja un HTML donde
+    # se esperaba un script, una hoja de estilos o una imagen
+    if expected in ("js", "css", "image") and kind == "html":
+        return "mismatch"
+    if expected == "image" and kind == "other" and not target.lower().endswith((".svg", ".ico")):
+        return "mismatch"
+    return None
+
+def check_file(root: str, path: str):
+    """
+    Analiza un HTML o CSS del espejo. Se ejecuta en los procesos del pool.
+    Devuelve None si el fichero no es HTML ni CSS.
+    """
+    kind = file_kind(path)
+    if kind is None:
+        return None
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+
+    if kind == "html":
+        parser = ReferenceParser()
+        parser.feed(text)
+        parser.close()
+        refs = parser.refs
+    else:
+        refs = css_references(text)
+
+    broken, remote, checked = [], 0, 0
+    for tag, ref, expected in dict.fromkeys(refs):
+        target, status = resolve_reference(root, path, ref)
+        if status == "remote":
+            remote += 1
+        if target is None:
+            continue
+        checked += 1
+        reason = check_reference(root, target, expected)
+        if reason:
+            broken.append({"ref": ref, "tag": tag, "reason": reason})
+
+    return {
+        "file": os.path.relpath(path, root),
+        "kind": kind,
+        "checked": checked,
+        "remote": remote,
+        "broken": broken,
+    }
+
+def list_files(root: str) -> list:
+    """
+    Candidatos a analizar: HTML, CSS y ficheros sin extensión.
+    """
+    candidates = []
+    for folder, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            lower = name.lower()
+            if lower.endswith(HTML_EXTENSIONS + CSS_EXTENSIONS) or not os.path.splitext(lower)[1]:
+                candidates.append(os.path.join(folder, name))
+    return candidates
+
+def scan_mirror(root: str, workers: int) -> list:
+    """
+    Análisis estático de todo el espejo en un pool de procesos.
+    """
+    paths = list_files(root)
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        results = pool.map(partial(check_file, root), paths, chunksize=chunksize)
+        return [result for result in results if result is not None]
+
+
+# ----------------------------------------------------------------
+# CARGA EN NAVEGADOR SIN RED
+# ----------------------------------------------------------------
+class QuietHandler(SimpleHTTPRequestHandler):
+    def guess_type(self, path):
+        # Las páginas que guardan los spiders no tienen extensión
+        if not os.path.splitext(path)[1] and file_kind(path) == "html":
+            return "text/html"
+        return super().guess_type(path)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(root: str):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=root))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def load_pages(root: str, pages: list, workers: int, timeout: int = PAGE_TIMEOUT) -> dict:
+    """
+    Carga cada página en Chromium headless. Solo se permite el servidor local
+    que sirve el espejo; cualquier otra petición se aborta y cuenta como fallida.
+    Devuelve {pagina: [peticiones fallidas]}.
+    """
+    from playwright.async_api import async_playwright
+
+    server = start_server(root)
+    origin = f"http://127.0.0.1:{server.server_address[1]}"
+    queue = asyncio.Queue()
+    for page_file in pages:
+        queue.put_nowait(page_file)
+    failures = {}
+
+    async def block_network(route, request):
+        if request.url.startswith(origin + "/"):
+            await route.continue_()
+        else:
+            await route.abort("blockedbyclient")
+
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            context = await browser.new_context()
+            await context.route("**/*", block_network)
+
+            async def worker():
+                while not queue.empty():
+                    page_file = queue.get_nowait()
+                    failed = failures[page_file] = []
+                    page = await context.new_page()
+                    page.on("requestfailed", lambda r, failed=failed: failed.append(
+                        {"url": r.url, "reason": r.failure or "failed"}))
+                    page.on("response", lambda r, failed=failed: r.status >= 400 and failed.append(
+                        {"url": r.url, "reason": f"HTTP {r.status}"}))
+                    url = f"{origin}/{quote(page_file.replace(os.sep, '/'))}"
+                    try:
+                        await page.goto(url, wait_until="networkidle", timeout=timeout)
+                    except Exception as e:
+                        failed.append({"url": url, "reason": f"load: {e}".splitlines()[0]})
+                    finally:
+                        await page.close()
+
+            await asyncio.gather(*(worker() for _ in range(workers)))
+            await browser.close()
+    finally:
+        server.shutdown()
+    return failures
+
+
+# ----------------------------------------------------------------
+# INFORME
+# ----------------------------------------------------------------
+def print_report(results: list, elapsed: float) -> dict:
+    broken_files = [r for r in results if r["broken"] or r.get("failed_requests")]
+    for result in sorted(broken_files, key=lambda r: r["file"]):
+        print(f"[ERROR] {result['file']}")
+        for item in result["broken"]:
+            print(f"    {item['reason']:<8} <{item['tag']}> {item['ref']}")
+        for item in result.get("failed_requests", []):
+            print(f"    request  {item['url']} ({item['reason']})")
+
+    summary = {
+        "event": "summary",
+        "elapsed": round(elapsed, 3),
+        "files": len(results),
+        "pages": sum(1 for r in results if r["kind"] == "html"),
+        "references": sum(r["checked"] for r in results),
+        "broken": sum(len(r["broken"]) for r in results),
+        "remote": sum(r["remote"] for r in results),
+        "failed_requests": sum(len(r.get("failed_requests", [])) for r in results),
+        "files_with_errors": len(broken_files),
+    }
+    print(f"\n[INFO] {summary['files']} ficheros ({summary['pages']} páginas), "
+          f"{summary['references']} referencias locales en {summary['elapsed']}s")
+    print(f"[INFO] Rotas: {summary['broken']}, remotas (requieren red): {summary['remote']}, "
+          f"peticiones fallidas en navegador: {summary['failed_requests']}")
+    return summary
+
+def write_report(path: str, results: list, summary: dict):
+    """
+    JSON lines, como el informe del spider: una línea por fichero con
+    problemas y una línea final de resumen.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for result in results:
+            if result["broken"] or result.get("failed_requests"):
+                f.write(json.dumps({"event": "file", **result}, ensure_ascii=False) + "\n")
+        f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+
+
+# ----------------------------------------------------------------
+# MAIN
+# ----------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Verifica que un sitio espejado funciona sin red.")
+    parser.add_argument("root", help="Carpeta del espejo (p.ej. ar/html o descarga_offline/kinsu.mx)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4,
+                        help="Procesos para el análisis estático (por defecto: %(default)s)")
+    parser.add_argument("--browser", action="store_true",
+                        help="Cargar además cada página en Chromium con la red bloqueada")
+    parser.add_argument("--browser-workers", type=int, default=4,
+                        help="Páginas cargadas a la vez con --browser (por defecto: %(default)s)")
+    parser.add_argument("--report", help="Guardar el informe como JSON lines en este fichero")
+    args = parser.parse_args()
+
+    root = os.path.abspath(args.root)
+    if not os.path.isdir(root):
+        print(f"[ERROR] No existe la carpeta {args.root}")
+        sys.exit(2)
+
+    started = time.perf_counter()
+    results = scan_mirror(root, args.workers)
+
+    if args.browser:
+        pages = [r["file"] for r in results if r["kind"] == "html"]
+        print(f"[INFO] Cargando {len(pages)} páginas en Chromium sin red...")
+        failures = asyncio.run(load_pages(root, pages, args.browser_workers))
+        for result in results:
+            if result["file"] in failures:
+                result["failed_requests"] = failures[result["file"]]
+
+    summary = print_report(results, time.perf_counter() - started)
+    if args.report:
+        write_report(args.report, results, summary)
+        print(f"[INFO] Informe guardado en {args.report}")
+
+    sys.exit(1 if summary["broken"] or summary["failed_requests"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,14 @@
 
 import os
 import sys
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse
 from collections import deque
 
 # Playwright
 from playwright.sync_api import sync_playwright
 
+from page_links import EXTRACT_LINKS_JS
+
 def make_valid_filename(url_path):
     """
     Convierte una ruta de URL en un nombre de archivo válido.
@@ -108,22 +110,14 @@ def crawl_website(root_url, base_folder="descargas"):
             # peticiones de red. Este ejemplo se enfoca en el HTML final.
             
             # Buscar enlaces en el DOM para seguir navegando
-            # Obtenemos todos los <a href="...">
-            anchor_elements = page.query_selector_all("a")
-            for anchor in anchor_elements:
-                href = anchor.get_attribute("href")
-                if not href:
-                    continue
-                # Construimos la URL completa
-                full_url = urljoin(current_url, href)
+            # Obtenemos todos los <a href="..."> (y rutas data-href/data-to)
+            # en una sola llamada al navegador, ya absolutos y sin fragmento
+            extracted = page.evaluate(EXTRACT_LINKS_JS, False)
+            for full_url in extracted["links"] + extracted["routes"]:
                 # Solo añadimos si pertenece al mismo dominio
                 if is_same_domain(full_url, root_domain):
-                    # Evitar anclas (fragmentos)
-                    parsed_link = urlparse(full_url)
-                    cleaned_link = parsed_link._replace(fragment="").geturl()
-                    
-                    if cleaned_link not in visited and cleaned_link not in to_visit:
-                        to_visit.append(cleaned_link)
+                    if full_url not in visited and full_url not in to_visit:
+                        to_visit.append(full_url)
         
         browser.close()
 
@@ -2,11 +2,13 @@
 import os
 import sys
 import re
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse
 from collections import deque
 
 from playwright.sync_api import sync_playwright
 
+from page_links import EXTRACT_LINKS_JS
+
 # ----------------------------------------------------------------
 # CONFIGURACIÓN
 # ----------------------------------------------------------------
@@ -244,17 +246,10 @@ def crawl_with_resources(root_url: str):
                 f.write(html_content)
             print(f"[INFO] HTML guardado en {html_local_path}")
 
-            # Descubrir más enlaces <a> en la página
-            anchors = page.query_selector_all("a")
-            for a in anchors:
-                href = a.get_attribute("href")
-                if not href:
-                    continue
-                full_url = urljoin(current_url, href)
-                parsed_link = urlparse(full_url)
-                # Omitir el fragment
-                link_no_frag = parsed_link._replace(fragment="").geturl()
-
+            # Descubrir más enlaces <a> en la página (una sola llamada al
+            # navegador; las URLs llegan absolutas y sin fragmento)
+            extracted = page.evaluate(EXTRACT_LINKS_JS, False)
+            for link_no_frag in extracted["links"] + extracted["routes"]:
                 # Solo si es mismo dominio
                 if is_same_domain(link_no_frag, root_domain):
                     if link_no_frag not in visited and link_no_frag not in to_visit:
@@ -1,11 +1,28 @@
 #!/usr/bin/env python3
 import os
-import sys
 import re
+import asyncio
+import argparse
+import mimetypes
+from fnmatch import fnmatch
+from html import unescape
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from html.parser import HTMLParser
 from urllib.parse import urlparse, urljoin
-from collections import deque
 
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
+
+from crawl_seeds import (
+    extract_route_paths,
+    parse_sitemap_xml,
+    read_route_list,
+    seed_urls,
+)
+from replay_cache import RECORD, REPLAY, ReplayStore, StoredResponse
+from crawl_report import CrawlReport, process_tree_rss
+from resource_index import ResourceIndex
+from page_links import EXTRACT_LINKS_JS
 
 # -------------------------------------
 # CONFIGURACIÓN / CONSTANTES
@@ -15,6 +32,52 @@ BASE_FOLDER = "descarga_offline"  # Carpeta base donde se guardará todo
 # Tipos de recurso que sí queremos interceptar y descargar (puedes ajustar)
 INTERCEPT_RESOURCE_TYPES = ["image", "stylesheet", "script", "font", "xhr", "fetch"]
 
+# Modo híbrido: antes de abrir el navegador se pide el documento por HTTP
+# (cliente con conexiones reutilizadas de Playwright, sin render). Si el HTML
+# crudo ya trae el contenido y los enlaces, se guarda tal cual.
+HYBRID_FETCH = True
+
+# Rutas (patrones fnmatch sobre el path) que fuerzan una decisión,
+# sin aplicar la heurística. P.ej. STATIC_ROUTES = ["/politica_privacidad.html"]
+STATIC_ROUTES = []
+RENDER_ROUTES = ["/quotation/*", "/app/*", "/signup/*"]
+
+# Ids habituales del nodo donde monta la SPA (React, Vue, Next...)
+SPA_ROOT_IDS = ("root", "app", "__next")
+
+# Texto visible mínimo para considerar que el HTML crudo ya tiene contenido
+MIN_STATIC_TEXT = 200
+
+# Páginas (pestañas) de Chromium renderizando en paralelo
+WORKERS = 4
+
+# Etapas posteriores al render: procesos para reescribir HTML (CPU) y
+# tamaño de las colas entre etapas (si se llenan, el render espera)
+REWRITE_WORKERS = os.cpu_count() or 2
+PIPELINE_QUEUE_SIZE = 16
+
+# Reintentos de navegación por página antes de darla por fallida
+NAV_RETRIES = 1
+
+# Memoria acotada en rastreos largos:
+# - cada worker recicla su contexto de Chromium tras N navegaciones, o antes
+#   si la memoria del proceso (spider + Chromium) supera MAX_RSS_MB (0 = sin límite).
+#   Por memoria solo se recicla tras MIN_NAVIGATIONS_PER_CONTEXT navegaciones:
+#   si el exceso no es de Chromium, reciclar en cada página no lo baja
+# - los cuerpos pendientes de escribir a disco no superan MAX_INFLIGHT_BYTES
+# - el mapa URL -> ruta local vive en un índice SQLite en disco
+RECYCLE_AFTER = 50
+MAX_RSS_MB = 2048
+MIN_NAVIGATIONS_PER_CONTEXT = 10
+MAX_INFLIGHT_BYTES = 64 * 1024 * 1024
+RESOURCE_INDEX_NAME = ".resource_index.sqlite"
+
+# Intentos de abrir un contexto antes de dar el worker por perdido
+CONTEXT_RETRIES = 2
+
+# URLs absolutas dentro del HTML (candidatas a reescribir)
+ABSOLUTE_URL_PATTERN = re.compile(r"""https?://[^\s"'<>()\\]+""")
+
 
 # -------------------------------------
 # FUNCIONES AUXILIARES
@@ -79,37 +142,498 @@ def is_same_domain(url: str, root_domain: str) -> bool:
     return urlparse(url).netloc == root_domain
 
 
+class RawPageParser(HTMLParser):
+    """
+    Analiza el HTML crudo (sin ejecutar JS) para decidir si hace falta
+    renderizar y, si no, extraer enlaces y recursos directamente.
+    """
+    RESOURCE_ATTRS = {"script": "src", "img": "src", "source": "src", "link": "href"}
+    # Tipo de recurso (como los de Playwright) según la etiqueta
+    TAG_TYPES = {"script": "script", "img": "image", "source": "image"}
+    PRELOAD_TYPES = {"style": "stylesheet", "script": "script", "font": "font", "image": "image"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self.resources = []        # [(url, tipo)]
+        self.text_length = 0
+        self.script_count = 0
+        self.empty_spa_root = False
+        self._pending_root = None  # profundidad del nodo raíz de la SPA abierto
+        self._depth = 0
+        self._skip = 0             # dentro de <script>, <style> o <noscript>
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if self._pending_root is not None:
+            # El nodo raíz de la SPA tiene hijos: ya viene prerenderizado
+            self._pending_root = None
+        self._depth += 1
+
+        if tag in ("script", "style", "noscript"):
+            self._skip += 1
+        if tag == "script":
+            self.script_count += 1
+        if tag == "div" and attrs.get("id") in SPA_ROOT_IDS:
+            self._pending_root = self._depth
+
+        if tag == "a" and attrs.get("href"):
+            self.links.append(attrs["href"])
+        attr = self.RESOURCE_ATTRS.get(tag)
+        if attr and attrs.get(attr):
+            rel = (attrs.get("rel") or "").lower()
+            if tag != "link":
+                self.resources.append((attrs[attr], self.TAG_TYPES[tag]))
+            elif rel == "stylesheet":
+                self.resources.append((attrs[attr], "stylesheet"))
+            elif rel in ("icon", "shortcut icon"):
+                self.resources.append((attrs[attr], "image"))
+            elif rel == "preload":
+                self.resources.append((attrs[attr], self.PRELOAD_TYPES.get(attrs.get("as"), "other")))
+        if attrs.get("srcset"):
+            self.resources.extend((c.strip().split(" ")[0], "image")
+                                  for c in attrs["srcset"].split(",") if c.strip())
+
+    def handle_endtag(self, tag):
+        if self._pending_root == self._depth:
+            # Se cerró el nodo raíz sin hijos: SPA vacía que necesita JS
+            self.empty_spa_root = True
+            self._pending_root = None
+        if tag in ("script", "style", "noscript") and self._skip:
+            self._skip -= 1
+        self._depth = max(self._depth - 1, 0)
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        text = data.strip()
+        if text and self._pending_root is not None:
+            self._pending_root = None
+        self.text_length += len(text)
+
+def needs_render(url: str, parser: RawPageParser) -> bool:
+    """
+    Decide si una página necesita pasar por Chromium.
+    - Primero la configuración por ruta (STATIC_ROUTES / RENDER_ROUTES).
+    - Si no, la heurística: raíz de SPA vacía, o poco texto visible
+      y scripts que probablemente lo generan.
+    """
+    path = urlparse(url).path or "/"
+    if any(fnmatch(path, pattern) for pattern in RENDER_ROUTES):
+        return True
+    if any(fnmatch(path, pattern) for pattern in STATIC_ROUTES):
+        return False
+    if parser.empty_spa_root:
+        return True
+    return parser.text_length < MIN_STATIC_TEXT and parser.script_count > 0
+
+# Índice abierto en solo lectura por cada proceso de reescritura
+_readonly_indexes = {}
+
+def rewrite_html(html_content: str, index_path: str) -> str:
+    """
+    Reemplaza en el HTML todas las referencias a URLs originales por la
+    ruta local en disco.
+
+    En lugar de recorrer todos los recursos conocidos, se buscan las URLs
+    absolutas presentes en el HTML y se resuelven en lote contra el índice,
+    así el coste depende del tamaño de la página y no del sitio.
+    Para algo más sólido, podría hacerse un parse con BeautifulSoup y
+    cambiar solo en atributos src, href, etc.
+    """
+    index = _readonly_indexes.get(index_path)
+    if index is None:
+        index = _readonly_indexes[index_path] = ResourceIndex(index_path, readonly=True)
+
+    def variants(token):
+        # Tal cual, sin la coma de un srcset y con entidades (&amp;) resueltas
+        return (token, token.rstrip(",;"), unescape(token))
+
+    tokens = set(ABSOLUTE_URL_PATTERN.findall(html_content))
+    mapping = index.lookup({v for token in tokens for v in variants(token)})
+    if not mapping:
+        return html_content
+
+    def replace(match):
+        token = match.group(0)
+        for variant in variants(token):
+            if variant in mapping:
+                # Normalizamos las barras (Windows, etc.)
+                local_path_norm = mapping[variant].replace("\\", "/")
+                return local_path_norm + token[len(variant):] if token.startswith(variant) else local_path_norm
+        return token
+
+    return ABSOLUTE_URL_PATTERN.sub(replace, html_content)
+
+def save_html(url: str, html_content: str):
+    local_html_path = local_path_for_html(url)
+    with open(local_html_path, "w", encoding="utf-8") as f:
+        f.write(html_content)
+    print(f"[INFO] HTML guardado en: {local_html_path}")
+
+def write_bytes(path: str, body: bytes):
+    with open(path, "wb") as f:
+        f.write(body)
+
+
+class PagePipeline:
+    """
+    Etapas posteriores al render, conectadas por colas acotadas para que
+    el navegador no espere a Python:
+      render -> [rewrite_queue] -> rewrite (pool de procesos)
+             -> [persist_queue] -> persist (un hilo de E/S)
+    Las escrituras de recursos interceptados también van al hilo de E/S.
+    Cada página se cierra en el informe cuando termina la etapa persist.
+    """
+
+    def __init__(self, report: CrawlReport, rewrite_workers: int = REWRITE_WORKERS,
+                 queue_size: int = PIPELINE_QUEUE_SIZE, max_inflight_bytes: int = MAX_INFLIGHT_BYTES):
+        self.report = report
+        # Índice en disco para mapear "URL original" -> "ruta local".
+        # Así, luego podemos reescribir en el HTML.
+        self.resource_map = ResourceIndex(os.path.join(BASE_FOLDER, RESOURCE_INDEX_NAME), reset=True)
+        self.max_inflight_bytes = max_inflight_bytes
+        self.inflight_bytes = 0
+        self.writes_done = asyncio.Event()
+        self.rewrite_workers = max(rewrite_workers, 1)
+        self.rewrite_queue = asyncio.Queue(maxsize=queue_size)
+        self.persist_queue = asyncio.Queue(maxsize=queue_size)
+        # "spawn": no heredar los hilos del driver de Playwright en los procesos hijos
+        self.cpu_pool = ProcessPoolExecutor(max_workers=self.rewrite_workers,
+                                            mp_context=get_context("spawn"))
+        self.io_pool = ThreadPoolExecutor(max_workers=1)
+        self.pending_writes = {}   # url -> escritura en curso
+        self.tasks = []
+
+    def start(self):
+        self.tasks = [asyncio.create_task(self._rewrite_stage()) for _ in range(self.rewrite_workers)]
+        self.tasks.append(asyncio.create_task(self._persist_stage()))
+
+    async def submit_page(self, url: str, html_content: str):
+        """
+        Entrega el HTML de una página a la etapa de reescritura.
+        Solo bloquea si la cola está llena (contrapresión).
+        """
+        await self.rewrite_queue.put((url, html_content))
+
+    async def store_resource(self, url: str, body: bytes, resource_type: str = "other",
+                             source: str = "network"):
+        """
+        Registra el recurso para la reescritura y encarga su escritura
+        al hilo de E/S, sin bloquear el bucle de eventos. Si los cuerpos
+        pendientes de escribir superan max_inflight_bytes, espera a que
+        el hilo de E/S libere memoria. Cada URL se guarda (y se anota en
+        el informe) una sola vez.
+        """
+        size = len(body)
+        while self.inflight_bytes and self.inflight_bytes + size > self.max_inflight_bytes:
+            self.writes_done.clear()
+            await self.writes_done.wait()
+
+        if url in self.resource_map:
+            return
+        self.report.resource(url, resource_type, size, source)
+        local_file_path = local_path_for_resource(url)
+        self.resource_map[url] = local_file_path
+        self.inflight_bytes += size
+        future = asyncio.get_running_loop().run_in_executor(self.io_pool, write_bytes, local_file_path, body)
+        self.pending_writes[url] = future
+        future.add_done_callback(lambda f: self._write_finished(url, size))
+
+    def _write_finished(self, url: str, size: int):
+        self.pending_writes.pop(url, None)
+        self.inflight_bytes -= size
+        self.writes_done.set()
+
+    async def stored_path(self, url: str):
+        """
+        Ruta local de un recurso ya guardado, esperando a que termine su
+        escritura si aún está en curso. None si no está o la escritura falló.
+        """
+        local_file_path = self.resource_map.get(url)
+        future = self.pending_writes.get(url)
+        if future is not None:
+            try:
+                await asyncio.shield(future)
+            except Exception:
+                return None
+        if local_file_path and os.path.isfile(local_file_path):
+            return local_file_path
+        return None
+
+    async def _rewrite_stage(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            url, html_content = await self.rewrite_queue.get()
+            try:
+                with self.report.timer(url, "rewrite"):
+                    html_content = await loop.run_in_executor(
+                        self.cpu_pool, rewrite_html, html_content, self.resource_map.path)
+                await self.persist_queue.put((url, html_content))
+            except Exception as e:
+                print(f"[ERROR] Al reescribir {url} -> {e}")
+                self.report.page_done(url, error=f"rewrite: {e}")
+            finally:
+                self.rewrite_queue.task_done()
+
+    async def _persist_stage(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            url, html_content = await self.persist_queue.get()
+            error = None
+            try:
+                with self.report.timer(url, "write"):
+                    await loop.run_in_executor(self.io_pool, save_html, url, html_content)
+            except Exception as e:
+                print(f"[ERROR] Al guardar {url} -> {e}")
+                error = f"write: {e}"
+            finally:
+                self.report.page_done(url, error=error)
+                self.persist_queue.task_done()
+
+    async def drain(self):
+        """
+        Espera a que terminen todas las etapas y libera los pools.
+        """
+        await self.rewrite_queue.join()
+        await self.persist_queue.join()
+        await asyncio.gather(*self.pending_writes.values(), return_exceptions=True)
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.cpu_pool.shutdown()
+        self.io_pool.shutdown()
+        self.resource_map.close()
+
+
+class Frontier:
+    """
+    Cola de URLs pendientes compartida por todos los workers.
+    Cada URL se encola una sola vez durante todo el rastreo.
+    """
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.seen = set()
+
+    def add(self, url: str) -> bool:
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        self.queue.put_nowait(url)
+        return True
+
+def enqueue_links(hrefs, current_url: str, root_domain: str, frontier: Frontier):
+    """
+    Añade a la cola los enlaces del mismo dominio todavía no vistos.
+    """
+    for href in hrefs:
+        if not href:
+            continue
+
+        # Construimos URL absoluta
+        full = urljoin(current_url, href)
+
+        # Quitamos fragmentos (#anchor)
+        parsed_link = urlparse(full)
+        full_no_frag = parsed_link._replace(fragment="").geturl()
+
+        # Solo si pertenece al mismo dominio
+        if is_same_domain(full_no_frag, root_domain):
+            frontier.add(full_no_frag)
+
+async def http_get(http, url: str, replay: ReplayStore = None) -> StoredResponse:
+    """
+    GET por HTTP sin navegador ('http' es un APIRequestContext de Playwright,
+    con conexiones reutilizadas). Con un almacén de replay activo, en modo
+    replay se responde desde la grabación (None si no existe) y en modo
+    record se graba la respuesta.
+    """
+    if replay is not None and replay.replaying:
+        return replay.get("GET", url)
+    resp = await http.get(url)
+    result = StoredResponse(resp.status, resp.headers, await resp.body())
+    if replay is not None and replay.recording:
+        replay.put("GET", url, None, result.status, result.headers, result.body)
+    return result
+
+def is_ok(resp: StoredResponse) -> bool:
+    return resp is not None and 200 <= resp.status < 300
+
+async def fetch_resource(http, url: str, pipeline: PagePipeline, replay: ReplayStore = None,
+                         resource_type: str = "other"):
+    """
+    Descarga un recurso por HTTP (sin navegador) y lo registra en el pipeline.
+    'resource_type' viene de la etiqueta que lo referencia (script, image...).
+    """
+    if url in pipeline.resource_map:
+        pipeline.report.count("http_resource_hits")
+        return
+    pipeline.report.count("http_resource_misses")
+    try:
+        resp = await http_get(http, url, replay)
+        if not is_ok(resp):
+            print(f"[ERROR] Al descargar recurso {url}: HTTP {resp.status if resp else 'sin grabar'}")
+            pipeline.report.count("resource_failures")
+            return
+        source = "replay" if replay is not None and replay.replaying else "http"
+        await pipeline.store_resource(url, resp.body, resource_type, source)
+    except Exception as ex:
+        print(f"[ERROR] Al descargar recurso {url}: {ex}")
+        pipeline.report.count("resource_failures")
+
+async def try_fast_path(http, current_url: str, root_domain: str, pipeline: PagePipeline,
+                        frontier: Frontier, replay: ReplayStore = None) -> bool:
+    """
+    Camino rápido del modo híbrido: pide el documento por HTTP.
+    - Si no es HTML (un PDF, una imagen enlazada con <a>...), se guarda como recurso.
+    - Si es HTML que no necesita JS, descarga sus recursos, encola sus enlaces
+      y lo entrega al pipeline para reescribirlo y guardarlo.
+    Devuelve False si la página necesita el render completo con Chromium.
+    """
+    report = pipeline.report
+    try:
+        with report.timer(current_url, "fetch"):
+            resp = await http_get(http, current_url, replay)
+    except Exception as e:
+        print(f"[ERROR] Petición HTTP fallida para {current_url} -> {e}")
+        return False
+    if not is_ok(resp):
+        return False
+
+    content_type = resp.headers.get("content-type", "")
+    if "html" not in content_type:
+        source = "replay" if replay is not None and replay.replaying else "http"
+        await pipeline.store_resource(current_url, resp.body, "document", source)
+        print(f"[INFO] Recurso guardado sin navegador: {current_url}")
+        report.set_mode(current_url, "resource")
+        report.page_done(current_url)
+        return True
+
+    html_content = resp.body.decode("utf-8", errors="replace")
+    parser = RawPageParser()
+    parser.feed(html_content)
+    if needs_render(current_url, parser):
+        return False
+
+    resources = {urljoin(current_url, src): resource_type for src, resource_type in parser.resources}
+    await asyncio.gather(*(
+        fetch_resource(http, resource_url, pipeline, replay, resource_type)
+        for resource_url, resource_type in resources.items()
+        if urlparse(resource_url).scheme in ("http", "https")
+    ))
+
+    print(f"[INFO] Página estática, sin render: {current_url}")
+    report.set_mode(current_url, "fast")
+    enqueue_links(parser.links, current_url, root_domain, frontier)
+    await pipeline.submit_page(current_url, html_content)
+    return True
+
+async def fetch_text(http, url: str, replay: ReplayStore = None) -> str:
+    """
+    Descarga un documento de texto por HTTP. Devuelve "" si falla.
+    """
+    try:
+        resp = await http_get(http, url, replay)
+        return resp.body.decode("utf-8", errors="replace") if is_ok(resp) else ""
+    except Exception as e:
+        print(f"[ERROR] No se pudo descargar {url} -> {e}")
+        return ""
+
+async def collect_seeds(http, root_url: str, sitemap: str = None, routes_file: str = None,
+                        routes_from=(), scan_scripts: bool = False,
+                        replay: ReplayStore = None) -> list:
+    """
+    Reúne las rutas conocidas del sitio antes de empezar a renderizar:
+    - sitemap.xml (y sus sitemaps hijos si es un índice)
+    - tablas de rutas en JS/JSON (/app/items/site_map de Directus, bundles de React...)
+    - los scripts del propio dominio referenciados por la página raíz
+    - una lista de rutas escrita a mano
+    """
+    routes = []
+
+    if sitemap is not None:
+        pending = [sitemap or urljoin(root_url, "/sitemap.xml")]
+        seen_sitemaps = set()
+        while pending:
+            sitemap_url = pending.pop()
+            if sitemap_url in seen_sitemaps:
+                continue
+            seen_sitemaps.add(sitemap_url)
+            pages, children = parse_sitemap_xml(await fetch_text(http, sitemap_url, replay))
+            routes.extend(pages)
+            pending.extend(children)
+
+    sources = [urljoin(root_url, source) for source in routes_from]
+    if scan_scripts:
+        parser = RawPageParser()
+        parser.feed(await fetch_text(http, root_url, replay))
+        root_domain = urlparse(root_url).netloc
+        sources.extend(
+            url for url in (urljoin(root_url, src) for src, resource_type in parser.resources
+                            if resource_type == "script")
+            if is_same_domain(url, root_domain)
+        )
+
+    texts = await asyncio.gather(*(fetch_text(http, source, replay) for source in sources))
+    for text in texts:
+        routes.extend(extract_route_paths(text))
+
+    if routes_file:
+        routes.extend(read_route_list(routes_file))
+
+    return seed_urls(root_url, routes)
+
+
 # -------------------------------------
 # FUNCIÓN PRINCIPAL DE RASTREO
 # -------------------------------------
-def crawl_with_resources(root_url: str):
+async def crawl_with_resources(root_url: str, workers: int = WORKERS, hybrid: bool = HYBRID_FETCH,
+                               sitemap: str = None, routes_file: str = None,
+                               routes_from=(), scan_scripts: bool = False,
+                               replay: ReplayStore = None, rewrite_workers: int = REWRITE_WORKERS,
+                               retries: int = NAV_RETRIES, report: CrawlReport = None,
+                               recycle_after: int = RECYCLE_AFTER, max_rss_mb: int = MAX_RSS_MB,
+                               max_inflight_bytes: int = MAX_INFLIGHT_BYTES):
     """
     - Usa Playwright para navegar a 'root_url'.
+    - Opcionalmente siembra la cola con las rutas conocidas (sitemap, tablas de rutas...).
+    - Reparte la cola entre 'workers' páginas que renderizan en paralelo.
     - Intercepta peticiones para descargar recursos estáticos en local.
-    - Guarda el HTML renderizado, reescribiendo referencias a esos recursos.
+    - Con 'replay' en modo record graba toda la red; en modo replay la sirve
+      desde la grabación sin tocar la red.
+    - Guarda el HTML renderizado, reescribiendo referencias a esos recursos;
+      la reescritura y las escrituras a disco corren en paralelo al render.
     - Sigue enlaces <a> del mismo dominio.
+    - Registra tiempos por etapa, recursos y fallos en 'report'.
+    - Mantiene la memoria acotada: cada worker recicla su contexto de Chromium
+      tras 'recycle_after' navegaciones o si se supera 'max_rss_mb'.
     """
     # Normalizamos la URL raíz
     parsed_root = urlparse(root_url)
     root_domain = parsed_root.netloc
 
     # Estructuras de datos
-    to_visit = deque([root_url])
-    visited = set()
+    frontier = Frontier()
+    frontier.add(root_url)
 
-    # Diccionario para mapear "URL original" -> "ruta local" en el disco.
-    # Así, luego podemos reescribir en el HTML.
-    resource_map = {}
+    # Etapas rewrite/persist (y el mapa URL original -> ruta local)
+    if report is None:
+        report = CrawlReport()
+    pipeline = PagePipeline(report, rewrite_workers, max_inflight_bytes=max_inflight_bytes)
+    resource_map = pipeline.resource_map
 
     # Iniciamos Playwright
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        # Cliente HTTP sin navegador (camino rápido y semillas), independiente
+        # de los contextos de Chromium que se reciclan
+        http = await p.request.new_context()
 
         # -------------------------------------
         # FUNCIÓN DE INTERCEPCIÓN
         # -------------------------------------
-        def handle_route(route):
+        async def handle_route(route):
             """
             Se llama cada vez que la página solicita un recurso.
             Decidimos si lo descargamos en local (si es un recurso estático)
@@ -119,124 +643,309 @@ def crawl_with_resources(root_url: str):
             url = request.url
             resource_type = request.resource_type
 
+            # Modo replay: todo sale de la grabación, nada de red
+            if replay is not None and replay.replaying:
+                stored = replay.get(request.method, url, request.post_data_buffer)
+                if stored is None:
+                    print(f"[ERROR] Petición no grabada: {request.method} {url}")
+                    await route.abort()
+                    return
+                if resource_type in INTERCEPT_RESOURCE_TYPES:
+                    await pipeline.store_resource(url, stored.body, resource_type, "replay")
+                await route.fulfill(status=stored.status, headers=stored.headers, body=stored.body)
+                return
+
+            # Modo record: se graban también los documentos y demás tipos
+            recording = replay is not None and replay.recording
+
             # Si queremos interceptar y descargar este tipo de recurso...
             if resource_type in INTERCEPT_RESOURCE_TYPES:
+                # Con la intercepción Chromium no usa su caché HTTP: cada página
+                # vuelve a pedir los bundles que ya se guardaron con otra
+                if url in pipeline.resource_map:
+                    report.count("route_resource_hits")
+                    if await fulfill_from_disk(route, url):
+                        return
+                else:
+                    report.count("route_resource_misses")
+            if resource_type in INTERCEPT_RESOURCE_TYPES or recording:
                 try:
                     # Descargamos el contenido (la respuesta) con route.fetch()
-                    resp = route.fetch()
-                    # Generamos la ruta local
-                    local_file_path = local_path_for_resource(url)
-                    resource_map[url] = local_file_path
+                    resp = await route.fetch()
+                    body = await resp.body()
+                    if recording:
+                        replay.put(request.method, url, request.post_data_buffer,
+                                   resp.status, resp.headers, body)
 
-                    # Guardamos en disco
-                    with open(local_file_path, "wb") as f:
-                        f.write(resp.body())
+                    # Guardamos en disco (en el hilo de E/S)
+                    if resource_type in INTERCEPT_RESOURCE_TYPES:
+                        await pipeline.store_resource(url, body, resource_type, "network")
 
                     # Para servirlo offline "al vuelo" (sin descargarlo de la red),
                     # podríamos usar route.fulfill(...). Sin embargo, si no te importa
                     # que el navegador lo descargue de la red, se puede usar route.continue_().
                     # Aun así, para forzar la carga local, haremos fulfill:
-                    route.fulfill(
+                    await route.fulfill(
                         status=resp.status,
                         headers=resp.headers,
-                        body=resp.body()
+                        body=body
                     )
                 except Exception as ex:
                     print(f"[ERROR] Al descargar recurso {url}: {ex}")
+                    report.count("resource_failures")
                     # Si falla, dejamos que siga la petición normal
-                    route.continue_()
+                    await route.continue_()
             else:
                 # No es un recurso que nos interese interceptar o
                 # es el documento principal (resource_type == "document" o "other")
-                route.continue_()
+                await route.continue_()
+
+        async def fulfill_from_disk(route, url: str) -> bool:
+            """
+            Sirve un recurso ya guardado desde su fichero local, sin red.
+            Solo los del dominio (los de otro origen necesitan sus cabeceras
+            CORS) y con tipo conocido por la extensión.
+            """
+            if not is_same_domain(url, root_domain):
+                return False
+            local_file_path = await pipeline.stored_path(url)
+            content_type = mimetypes.guess_type(local_file_path)[0] if local_file_path else None
+            if not content_type:
+                return False
+            await route.fulfill(path=local_file_path, content_type=content_type)
+            return True
+
+        async def open_context():
+            """
+            Crea un contexto nuevo con la intercepción activada y su página.
+            """
+            context = await browser.new_context()
+            # Activamos la intercepción para todas las peticiones:
+            await context.route("**/*", handle_route)
+            return context, await context.new_page()
 
-        # Activamos la intercepción para todas las peticiones:
-        context.route("**/*", handle_route)
-        page = context.new_page()
+        async def reopen_context(context=None):
+            """
+            Cierra 'context' (si hay) y abre uno nuevo, con reintentos. Si
+            Chromium ya no abre contextos, la excepción termina el worker.
+            """
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:
+                    print(f"[ERROR] Al cerrar el contexto -> {e}")
+            for attempt in range(CONTEXT_RETRIES + 1):
+                try:
+                    return await open_context()
+                except Exception as e:
+                    report.count("context_failures")
+                    if attempt == CONTEXT_RETRIES:
+                        raise
+                    print(f"[INFO] Reintentando abrir el contexto -> {e}")
+                    await asyncio.sleep(1)
+
+        def should_recycle(navigations: int) -> bool:
+            if recycle_after and navigations >= recycle_after:
+                return True
+            if navigations < MIN_NAVIGATIONS_PER_CONTEXT:
+                return False
+            return bool(max_rss_mb) and process_tree_rss() > max_rss_mb * 1024 * 1024
 
         # -------------------------------------
-        # RASTREO
+        # SEMILLAS
         # -------------------------------------
-        while to_visit:
-            current_url = to_visit.popleft()
-
-            if current_url in visited:
-                continue
-            visited.add(current_url)
+        seeds = await collect_seeds(http, root_url, sitemap, routes_file, routes_from,
+                                    scan_scripts, replay)
+        added = sum(frontier.add(url) for url in seeds)
+        if seeds:
+            print(f"[INFO] Cola sembrada con {added} rutas conocidas")
 
+        # -------------------------------------
+        # RASTREO
+        # -------------------------------------
+        async def visit(page, current_url: str) -> bool:
+            """
+            Procesa una URL. Devuelve True si se usó el navegador.
+            """
             print(f"[INFO] Visitando: {current_url}")
 
-            # Navegamos
-            try:
-                page.goto(current_url, timeout=30000)  # 30 seg
-                page.wait_for_load_state("networkidle")
-            except Exception as e:
-                print(f"[ERROR] No se pudo navegar a {current_url} -> {e}")
-                continue
-
-            # Obtenemos el HTML final (renderizado)
-            html_content = page.content()
-
-            # Reemplazamos en el HTML todas las referencias
-            # a URLs originales por la ruta local en disco.
-            #
-            # Esto es un string replace naive. Para algo más sólido,
-            # podría hacerse un parse con BeautifulSoup y cambiar solo
-            # en atributos src, href, etc.
-            for original_url, local_path in resource_map.items():
-                # Normalizamos las barras (Windows, etc.)
-                local_path_norm = local_path.replace("\\", "/")
-                # Reemplazo directo
-                html_content = html_content.replace(original_url, local_path_norm)
+            # Modo híbrido: solo abrimos Chromium si el HTML crudo no basta
+            if hybrid and await try_fast_path(http, current_url, root_domain,
+                                              pipeline, frontier, replay):
+                return False
 
-            # Guardamos la página HTML con las rutas reescritas
-            local_html_path = local_path_for_html(current_url)
-            with open(local_html_path, "w", encoding="utf-8") as f:
-                f.write(html_content)
-            print(f"[INFO] HTML guardado en: {local_html_path}")
-
-            # Buscamos enlaces <a> en el DOM para seguir rastreando
-            anchors = page.query_selector_all("a")
-            for a in anchors:
-                href = a.get_attribute("href")
-                if not href:
-                    continue
-
-                # Construimos URL absoluta
-                full = urljoin(current_url, href)
-
-                # Quitamos fragmentos (#anchor)
-                parsed_link = urlparse(full)
-                full_no_frag = parsed_link._replace(fragment="").geturl()
-
-                # Solo si pertenece al mismo dominio
-                if is_same_domain(full_no_frag, root_domain):
-                    if full_no_frag not in visited and full_no_frag not in to_visit:
-                        to_visit.append(full_no_frag)
-
-        browser.close()  # Cerrar el navegador
+            # Navegamos (con reintentos)
+            for attempt in range(retries + 1):
+                try:
+                    with report.timer(current_url, "navigation"):
+                        await page.goto(current_url, timeout=30000)  # 30 seg
+                    with report.timer(current_url, "networkidle"):
+                        await page.wait_for_load_state("networkidle")
+                    break
+                except Exception as e:
+                    if attempt < retries:
+                        print(f"[INFO] Reintentando {current_url} -> {e}")
+                        report.retry(current_url)
+                        continue
+                    print(f"[ERROR] No se pudo navegar a {current_url} -> {e}")
+                    report.page_done(current_url, error=f"navigation: {e}")
+                    return True
+
+            # Obtenemos el HTML final (renderizado) y los enlaces <a> y
+            # recursos del DOM, en una sola llamada
+            with report.timer(current_url, "content"):
+                html_content = await page.content()
+            with report.timer(current_url, "extract"):
+                extracted = await page.evaluate(EXTRACT_LINKS_JS, True)
+            enqueue_links(extracted["links"] + extracted["routes"], current_url, root_domain, frontier)
+
+            # Recursos del dominio referenciados pero no pedidos durante el
+            # render (srcset alternativos, imágenes lazy...) para que la copia
+            # offline no quede con referencias rotas. Van antes de entregar la
+            # página, para que ya estén en el índice cuando se reescriba.
+            await asyncio.gather(*(
+                fetch_resource(http, resource_url, pipeline, replay, resource_type)
+                for resource_url, resource_type in extracted["resources"]
+                if is_same_domain(resource_url, root_domain) and resource_url not in resource_map
+            ))
+
+            # La reescritura y el guardado siguen en el pipeline mientras
+            # esta página ya puede navegar a la siguiente URL
+            await pipeline.submit_page(current_url, html_content)
+            return True
+
+        async def worker():
+            context, page = await reopen_context()
+            navigations = 0
+            while True:
+                current_url = await frontier.queue.get()
+                try:
+                    if await visit(page, current_url):
+                        navigations += 1
+                except Exception as e:
+                    print(f"[ERROR] Fallo procesando {current_url} -> {e}")
+                    report.page_done(current_url, error=str(e))
+                    navigations += 1
+                finally:
+                    frontier.queue.task_done()
+
+                # Reciclado: se descarta el contexto (y la memoria que Chromium
+                # acumuló en él) y se abre uno limpio
+                if navigations and should_recycle(navigations):
+                    context, page = await reopen_context(context)
+                    navigations = 0
+                    report.count("context_recycles")
+
+        pipeline.start()
+        tasks = [asyncio.create_task(worker()) for _ in range(max(workers, 1))]
+
+        # Se espera a que se vacíe la cola, pero también a los workers: un
+        # worker solo termina si falla, y si caen todos la cola no se vaciaría
+        queue_done = asyncio.create_task(frontier.queue.join())
+        alive = set(tasks)
+        while alive:
+            done, alive = await asyncio.wait(alive | {queue_done}, return_when=asyncio.FIRST_COMPLETED)
+            if queue_done in done:
+                break
+            alive.discard(queue_done)
+            for task in done:
+                print(f"[ERROR] Worker terminado -> {task.exception()}")
+                report.count("worker_failures")
+        if not queue_done.done():
+            print(f"[ERROR] No queda ningún worker, se abandonan {frontier.queue.qsize()} URLs en cola")
+            queue_done.cancel()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await pipeline.drain()
+        await http.dispose()
+
+        await browser.close()  # Cerrar el navegador
 
 
 # -------------------------------------
 # MAIN
 # -------------------------------------
 def main():
-    if len(sys.argv) < 2:
-        print("Uso: python webspider_react_offline.py <URL>")
-        sys.exit(1)
-
-    root_url = sys.argv[1].strip()
+    parser = argparse.ArgumentParser(
+        description="Descarga offline de un sitio React con sus recursos estáticos.")
+    parser.add_argument("url", help="URL raíz, p.ej. https://kinsu.mx/")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="Páginas renderizando en paralelo (por defecto: %(default)s)")
+    parser.add_argument("--rewrite-workers", type=int, default=REWRITE_WORKERS,
+                        help="Procesos para reescribir HTML (por defecto: %(default)s)")
+    parser.add_argument("--retries", type=int, default=NAV_RETRIES,
+                        help="Reintentos de navegación por página (por defecto: %(default)s)")
+    parser.add_argument("--report", default=os.path.join(BASE_FOLDER, "crawl_report.jsonl"),
+                        help="Informe JSON lines del rastreo (por defecto: %(default)s)")
+    parser.add_argument("--recycle-after", type=int, default=RECYCLE_AFTER,
+                        help="Navegaciones por contexto antes de reciclarlo, 0 = nunca (por defecto: %(default)s)")
+    parser.add_argument("--max-rss", type=int, default=MAX_RSS_MB,
+                        help="MB de memoria (spider + Chromium) que fuerzan el reciclado, 0 = sin límite "
+                             "(por defecto: %(default)s)")
+    parser.add_argument("--max-inflight-mb", type=int, default=MAX_INFLIGHT_BYTES // (1024 * 1024),
+                        help="MB de cuerpos pendientes de escribir a disco (por defecto: %(default)s)")
+    parser.add_argument("--no-hybrid", action="store_true",
+                        help="Renderizar siempre con Chromium, sin el camino rápido por HTTP")
+    parser.add_argument("--sitemap", nargs="?", const="", default=None,
+                        help="Sembrar la cola desde un sitemap.xml (por defecto <raíz>/sitemap.xml)")
+    parser.add_argument("--routes", dest="routes_file",
+                        help="Fichero con rutas o URLs a sembrar, una por línea")
+    parser.add_argument("--routes-from", action="append", default=[],
+                        help="JS o JSON con tablas de rutas (p.ej. /app/items/site_map). Repetible")
+    parser.add_argument("--scan-scripts", action="store_true",
+                        help="Buscar tablas de rutas en los scripts del dominio que carga la página raíz")
+    replay_group = parser.add_mutually_exclusive_group()
+    replay_group.add_argument("--record", metavar="CARPETA",
+                              help="Grabar todas las respuestas de red en CARPETA")
+    replay_group.add_argument("--replay", metavar="CARPETA",
+                              help="Servir todas las peticiones desde la grabación en CARPETA, sin red")
+    args = parser.parse_args()
+
+    root_url = args.url.strip()
     if not root_url.startswith("http"):
         root_url = "https://" + root_url  # Ajuste si no lleva protocolo
 
     # Creamos la carpeta base si no existe
     os.makedirs(BASE_FOLDER, exist_ok=True)
 
+    replay = None
+    if args.record:
+        replay = ReplayStore(args.record, RECORD)
+    elif args.replay:
+        replay = ReplayStore(args.replay, REPLAY)
+
+    report = CrawlReport(args.report)
+
     # Ejecutamos la lógica de rastreo
-    crawl_with_resources(root_url)
+    asyncio.run(crawl_with_resources(
+        root_url,
+        workers=args.workers,
+        hybrid=not args.no_hybrid,
+        sitemap=args.sitemap,
+        routes_file=args.routes_file,
+        routes_from=args.routes_from,
+        scan_scripts=args.scan_scripts,
+        replay=replay,
+        rewrite_workers=args.rewrite_workers,
+        retries=args.retries,
+        report=report,
+        recycle_after=args.recycle_after,
+        max_rss_mb=args.max_rss,
+        max_inflight_bytes=args.max_inflight_mb * 1024 * 1024,
+    ))
+    extra = {}
+    if replay is not None:
+        replay.close()
+        extra["replay"] = {"mode": replay.mode, "entries": len(replay.entries),
+                           "hits": replay.hits, "misses": replay.misses}
+        print(f"[INFO] Replay ({replay.mode}): {len(replay.entries)} respuestas, "
+              f"{replay.hits} aciertos, {replay.misses} fallos.")
+    summary = report.close(**extra)
+    print(f"[INFO] {summary['pages']} páginas en {summary['elapsed']}s, {summary['failures']} fallos. "
+          f"Resumen: python crawl_report.py {args.report}")
     print("[INFO] Proceso finalizado.")
 
 
 if __name__ == "__main__":
     main()
-